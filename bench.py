@@ -0,0 +1,41 @@
+from src.executor.bench import BenchmarkExecutor
+import argparse
+
+
+if __name__ == '__main__':
+
+    # build arg parser
+    parser = argparse.ArgumentParser(description='Benchmark scanners against synthetic universes.')
+    parser.add_argument('--scanners', nargs='+', default=['wheelput', 'cps', 'gamma', 'executor'],
+        help='The scan targets to benchmark (wheelput, cps, gamma, multi, executor).')
+    parser.add_argument('--symbols', nargs='+', type=int, default=[10, 100], help='The universe sizes to scan.')
+    parser.add_argument('--strikes', nargs='+', type=int, default=[40], help='The strikes per chain.')
+    parser.add_argument('--expirations', nargs='+', type=int, default=[13], help='The weekly expirations per symbol.')
+    parser.add_argument('--workers', nargs='+', type=int, default=[6], help='The worker process counts.')
+    parser.add_argument('--latency', nargs='+', type=float, default=[0.05], help='The simulated api latencies in seconds.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='The uniform latency jitter in seconds.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='The fraction of api requests failing.')
+    parser.add_argument('--rate-allowed', type=int, default=1000000, help='The api requests allowed per window.')
+    parser.add_argument('--rate-window', type=float, default=1.0, help='The api rate-limit window in seconds.')
+    parser.add_argument('--async-fetch', action='store_true', help='Fetch put chains on the async fetch stage.')
+    parser.add_argument('--output', type=str, default=None, help='The json file to save results to.')
+
+    # parse args
+    args = parser.parse_args()
+
+    # execute benchmark
+    executor = BenchmarkExecutor(
+        scanners=args.scanners,
+        symbol_counts=args.symbols,
+        strike_counts=args.strikes,
+        expiration_counts=args.expirations,
+        worker_counts=args.workers,
+        latencies=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_allowed=args.rate_allowed,
+        rate_window=args.rate_window,
+        async_fetch=args.async_fetch,
+        output_file=args.output
+    )
+    executor.run()
@@ -10,4 +10,5 @@ def clean_directory(path):
 
 if __name__ == '__main__':
     clean_directory('log')
-    clean_directory('scan')
\ No newline at end of file
+    clean_directory('scan')
+    clean_directory('cache/chains')
\ No newline at end of file
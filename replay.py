@@ -0,0 +1,37 @@
+from src.api.replay import ResponseArchive, ReplayServer
+import argparse
+
+
+if __name__ == '__main__':
+
+    # build arg parser
+    parser = argparse.ArgumentParser(description='Serve a recorded Tradier archive for offline scans.')
+    parser.add_argument('archive',
+        type=str,
+        help='The directory of recorded segments (written with TRADIER_RECORD set).'
+    )
+    parser.add_argument('--port', type=int, default=8787, help='The local port to serve on.')
+    parser.add_argument('--latency', type=float, default=0.0, help='The mean response latency in seconds.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='The uniform latency jitter in seconds.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='The fraction of requests failing with 500.')
+    parser.add_argument('--rate-allowed', type=int, default=120, help='The requests allowed per rate-limit window.')
+    parser.add_argument('--rate-window', type=float, default=60.0, help='The rate-limit window in seconds.')
+    parser.add_argument('--no-rate-limit', action='store_true', help='Report but never enforce rate limits.')
+
+    # parse args
+    args = parser.parse_args()
+
+    # serve archive
+    server = ReplayServer(
+        archive=ResponseArchive(args.archive),
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_allowed=args.rate_allowed,
+        rate_window=args.rate_window,
+        enforce_rate_limit=not args.no_rate_limit
+    )
+    print('Set TRADIER_ENDPOINT={} to replay.'.format(server.endpoint), flush=True)
+    try: server.serve_forever()
+    except KeyboardInterrupt: server.stop()
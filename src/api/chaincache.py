@@ -0,0 +1,177 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+import threading
+import shutil
+import gzip
+import json
+import time
+import os
+
+
+class ChainCache:
+
+    def __init__(self,
+        root='cache/chains',
+        ttl=300.0,
+        stale_ttl=3600.0,
+        revalidate=False,
+        max_refreshers=4
+    ):
+
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.revalidate = revalidate
+        self.max_refreshers = max_refreshers
+
+        # save date
+        self.date = date.today().strftime('%Y-%m-%d')
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.__prune()
+
+        # build refreshers lazily per process
+        self.refresher = None
+        self.refresher_pid = None
+        self.refreshing = None
+        self.lk = None
+
+    def __getstate__(self):
+
+        # never ship live threads to other processes
+        state = self.__dict__.copy()
+        state['refresher'] = None
+        state['refresher_pid'] = None
+        state['refreshing'] = None
+        state['lk'] = None
+        return state
+
+    def fetch_chain(self, symbol, expiration, fetch_fn, greeks=True):
+        path = self.__chain_path(symbol, expiration, greeks)
+        cached = self.__load(path)
+
+        # serve fresh snapshot
+        if cached is not None:
+            chain, age = cached
+            if age <= self.ttl: return chain
+
+            # serve stale snapshot while refreshing
+            if self.revalidate and age <= self.stale_ttl:
+                self.__refresh(path, fetch_fn)
+                return chain
+
+        # fetch and store chain
+        chain = fetch_fn()
+        if chain is not None: self.__save(path, chain)
+        return chain
+
+    def fetch_expirations(self, symbol, fetch_fn):
+        path = self.__expirations_path(symbol)
+
+        # serve today's expirations
+        cached = self.__load(path)
+        if cached is not None: return cached[0]
+
+        # fetch and store expirations
+        expirations = fetch_fn()
+        if expirations is not None: self.__save(path, expirations)
+        return expirations
+
+    def load_chain(self, symbol, expiration, greeks=True):
+        cached = self.__load(self.__chain_path(symbol, expiration, greeks))
+        if cached is None or cached[1] > self.ttl: return None
+        return cached[0]
+
+    def load_stale_chain(self, symbol, expiration, greeks=True):
+        if not self.revalidate: return None
+        cached = self.__load(self.__chain_path(symbol, expiration, greeks))
+        if cached is None or cached[1] > self.stale_ttl: return None
+        return cached[0]
+
+    def save_chain(self, symbol, expiration, chain, greeks=True):
+        self.__save(self.__chain_path(symbol, expiration, greeks), chain)
+
+    def load_expirations(self, symbol):
+        cached = self.__load(self.__expirations_path(symbol))
+        if cached is None: return None
+        return cached[0]
+
+    def save_expirations(self, symbol, expirations):
+        self.__save(self.__expirations_path(symbol), expirations)
+
+    def close(self):
+
+        # wait for background refreshes
+        if self.refresher is not None and self.refresher_pid == os.getpid():
+            self.refresher.shutdown(wait=True)
+        self.refresher = None
+        self.refresher_pid = None
+
+    def __refresh(self, path, fetch_fn):
+        pid = os.getpid()
+        if self.refresher is None or self.refresher_pid != pid:
+            self.refresher = ThreadPoolExecutor(max_workers=self.max_refreshers)
+            self.refresher_pid = pid
+            self.refreshing = set()
+            self.lk = threading.Lock()
+
+        # skip duplicate refreshes
+        with self.lk:
+            if path in self.refreshing: return
+            self.refreshing.add(path)
+
+        def refresh():
+            try:
+                chain = fetch_fn()
+                if chain is not None: self.__save(path, chain)
+            finally:
+                with self.lk: self.refreshing.discard(path)
+
+        self.refresher.submit(refresh)
+
+    def __prune(self):
+
+        # drop past expiration days
+        for day_path in (self.root / 'expirations').glob('*'):
+            if day_path.name != self.date: shutil.rmtree(day_path, ignore_errors=True)
+
+        # drop expired chain snapshots
+        for symbol_path in self.root.iterdir():
+            if symbol_path.name == 'expirations' or not symbol_path.is_dir(): continue
+            for path in symbol_path.glob('*.json.gz'):
+                if path.name[:10] < self.date: path.unlink(missing_ok=True)
+            if not any(symbol_path.iterdir()): symbol_path.rmdir()
+
+    def __load(self, path):
+        try:
+
+            # check snapshot age
+            age = time.time() - os.stat(path).st_mtime
+
+            # decode compressed snapshot
+            f = gzip.open(path, 'rt')
+            data = json.load(f)
+            f.close()
+
+        except: return None
+        return data, age
+
+    def __save(self, path, data):
+        try:
+
+            # atomically rewrite compressed snapshot
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name('{}.{}.{}.tmp'.format(path.name, os.getpid(), threading.get_ident()))
+            f = gzip.open(tmp_path, 'wt', compresslevel=1)
+            json.dump(data, f, separators=(',', ':'))
+            f.close()
+            os.replace(tmp_path, path)
+
+        except: pass
+
+    def __chain_path(self, symbol, expiration, greeks):
+        name = '{}.json.gz' if greeks else '{}-nogreeks.json.gz'
+        return self.root / symbol.replace('/', '_') / name.format(expiration)
+
+    def __expirations_path(self, symbol):
+        return self.root / 'expirations' / self.date / '{}.json.gz'.format(symbol.replace('/', '_'))
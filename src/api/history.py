@@ -0,0 +1,139 @@
+from src.util.analytics import price_returns
+from datetime import date
+from pathlib import Path
+import numpy as np
+import json
+import os
+
+
+class PriceHistory:
+
+    def __init__(self, dates, symbols, closes, index):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.closes = closes
+        self.index = index
+        self.columns = {s: i for i, s in enumerate(self.symbols)}
+
+    def get(self, symbol):
+
+        # fetch aligned close column
+        col = self.columns.get(symbol)
+        if col is None: return None
+        return self.closes[:, col]
+
+    def last(self, symbol):
+
+        # fetch latest close
+        closes = self.get(symbol)
+        if closes is None or closes.shape[0] == 0: return None
+        if np.isnan(closes[-1]): return None
+        return round(float(closes[-1]), 2)
+
+    def returns(self, symbol):
+
+        # convert prices to returns
+        closes = self.get(symbol)
+        if closes is None: return None
+        return price_returns(closes)
+
+    def validate(self, symbol):
+
+        # require full index calendar
+        closes = self.get(symbol)
+        if closes is None: return False
+        return not np.isnan(closes).any()
+
+
+class HistoryStore:
+
+    fields = ['open', 'high', 'low', 'close', 'volume']
+    dtype = np.dtype([('date', 'datetime64[D]')] + [(f, np.float64) for f in fields])
+
+    def __init__(self, root='cache/history', adjust_tolerance=1e-4):
+        self.adjust_tolerance = adjust_tolerance
+
+        # save date
+        self.date = date.today().strftime('%Y-%m-%d')
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        # load sync dates
+        self.meta_path = self.root / 'meta.json'
+        if self.meta_path.exists():
+            f = open(self.meta_path, 'r')
+            self.meta = json.load(f)
+            f.close()
+        else: self.meta = {}
+
+    def load(self, symbol):
+
+        # memory-map symbol bars
+        path = self.__path(symbol)
+        if not path.exists(): return None
+        return np.load(path, mmap_mode='r')
+
+    def last_date(self, symbol):
+        bars = self.load(symbol)
+        if bars is None or bars.shape[0] == 0: return None
+        return bars['date'][-1]
+
+    def is_synced(self, symbol):
+        return self.meta.get(symbol) == self.date
+
+    def append(self, symbol, bars, allow_empty=False):
+
+        # keep completed sessions only
+        today = np.datetime64(self.date, 'D')
+        bars = bars[bars['date'] < today]
+
+        # leave failed downloads unsynced
+        if bars.shape[0] == 0:
+            if allow_empty: self.meta[symbol] = self.date
+            return True
+        stored = self.load(symbol)
+        if stored is not None and stored.shape[0] > 0:
+
+            # reject bars adjusted for new corporate actions
+            if not self.__matches(stored, bars): return False
+            bars = np.concatenate([np.asarray(stored), bars[bars['date'] > stored['date'][-1]]])
+
+        self.__write(symbol, bars)
+        self.meta[symbol] = self.date
+        return True
+
+    def rewrite(self, symbol, bars):
+
+        # replace series with readjusted bars
+        today = np.datetime64(self.date, 'D')
+        bars = bars[bars['date'] < today]
+        if bars.shape[0] == 0: return False
+
+        self.__write(symbol, bars)
+        self.meta[symbol] = self.date
+        return True
+
+    def save_meta(self):
+        f = open(self.meta_path, 'w+')
+        json.dump(self.meta, f)
+        f.close()
+
+    def __matches(self, stored, bars):
+
+        # compare overlapping closes
+        _, i, j = np.intersect1d(stored['date'], bars['date'], return_indices=True)
+        return np.allclose(stored['close'][i], bars['close'][j], rtol=self.adjust_tolerance, atol=0.0)
+
+    def __write(self, symbol, bars):
+        if bars.shape[0] == 0: return
+
+        # atomically rewrite symbol file
+        path = self.__path(symbol)
+        tmp_path = path.with_name(path.name + '.tmp')
+        f = open(tmp_path, 'wb')
+        np.save(f, bars.astype(self.dtype))
+        f.close()
+        os.replace(tmp_path, path)
+
+    def __path(self, symbol):
+        return self.root / '{}-1d.npy'.format(symbol.replace('/', '_'))
@@ -0,0 +1,252 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+from pathlib import Path
+import threading
+import random
+import uuid
+import gzip
+import json
+import time
+import os
+
+
+rate_headers = ['X-Ratelimit-Allowed', 'X-Ratelimit-Used', 'X-Ratelimit-Available', 'X-Ratelimit-Expiry']
+
+
+def request_key(path, params):
+    params = sorted((k, str(v)) for k, v in params.items())
+    return path.strip('/') + '?' + '&'.join('{}={}'.format(k, v) for k, v in params)
+
+
+class ResponseRecorder:
+
+    def __init__(self, root):
+
+        # one segment per process
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.lk = threading.Lock()
+
+        # open writer lazily per process
+        self.writer = None
+        self.writer_pid = None
+
+    def __getstate__(self):
+
+        # never ship open files to other processes
+        state = self.__dict__.copy()
+        state['lk'] = None
+        state['writer'] = None
+        state['writer_pid'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lk = threading.Lock()
+
+    def record(self, path, params, status, headers, body, latency):
+        entry = {
+            'key': request_key(path, params),
+            'status': status,
+            'headers': {h: headers[h] for h in rate_headers if h in headers},
+            'body': body,
+            'latency': round(latency, 4),
+            'time': round(time.time(), 3)
+        }
+
+        # stream entry into open segment
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self.lk: self.__get_writer().write(line)
+
+    def close(self):
+
+        # finish segment gzip member
+        with self.lk:
+            if self.writer is not None and self.writer_pid == os.getpid():
+                self.writer.close()
+            self.writer = None
+            self.writer_pid = None
+
+    def __get_writer(self):
+
+        # reopen segment after fork/spawn
+        pid = os.getpid()
+        if self.writer is not None and self.writer_pid == pid:
+            return self.writer
+
+        # one segment per recorder per process
+        segment = self.root / 'segment-{}-{}.jsonl.gz'.format(pid, uuid.uuid4().hex[:8])
+        self.writer = gzip.open(segment, 'wt')
+        self.writer_pid = pid
+        return self.writer
+
+
+class ResponseArchive:
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.responses = {}
+        self.quotes = {}
+
+        # load recorded segments
+        for segment in sorted(self.root.glob('*.jsonl.gz')):
+            f = gzip.open(segment, 'rt')
+            for line in f:
+                try: self.add(json.loads(line))
+                except ValueError: continue
+            f.close()
+
+    def add(self, entry):
+        if entry['status'] != 200: return
+        self.responses[entry['key']] = entry
+
+        # index quotes by symbol for rebatching
+        if entry['key'].startswith('quotes?'):
+            try: quotes = json.loads(entry['body'])['quotes'].get('quote', [])
+            except (ValueError, KeyError, AttributeError): return
+            if isinstance(quotes, dict): quotes = [quotes]
+            for quote in quotes: self.quotes[quote['symbol']] = quote
+
+    def lookup(self, path, params):
+
+        # serve exact recorded request
+        entry = self.responses.get(request_key(path, params))
+        if entry is not None: return entry['body']
+
+        # assemble quote batches from recorded quotes
+        if path.strip('/') == 'quotes' and 'symbols' in params:
+            quotes = [self.quotes[s] for s in params['symbols'].split(',') if s in self.quotes]
+            if len(quotes) == 0: return None
+            if len(quotes) == 1: quotes = quotes[0]
+            return json.dumps({'quotes': {'quote': quotes}})
+
+        return None
+
+
+class ReplayServer:
+
+    def __init__(self,
+        archive,
+        host='127.0.0.1',
+        port=8787,
+        base_path='/v1/',
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        rate_allowed=120,
+        rate_window=60.0,
+        enforce_rate_limit=True
+    ):
+
+        self.archive = archive
+        self.host = host
+        self.port = port
+        self.base_path = base_path
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_allowed = rate_allowed
+        self.rate_window = rate_window
+        self.enforce_rate_limit = enforce_rate_limit
+
+        # simulated rate-limit window
+        self.lk = threading.Lock()
+        self.rate_used = 0
+        self.rate_expiry = 0.0
+        self.request_count = 0
+        self.byte_count = 0
+
+        # build threaded server
+        self.httpd = ThreadingHTTPServer((host, port), self.__build_handler())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = None
+
+    @property
+    def endpoint(self):
+        return 'http://{}:{}{}'.format(self.host, self.port, self.base_path)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None: self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def handle_request(self, path, params):
+
+        # simulate network behavior
+        self.__simulate_latency()
+        headers, limited = self.__acquire_rate()
+        if limited: return 429, 'Rate limit exceeded', headers
+        if random.random() < self.error_rate: return 500, 'Simulated error', headers
+
+        # replay archived body
+        body = self.archive.lookup(path, params)
+        if body is None: return 404, 'Not recorded', headers
+        with self.lk: self.byte_count += len(body)
+        return 200, body, headers
+
+    def __acquire_rate(self):
+        with self.lk:
+            now = time.time()
+            self.request_count += 1
+
+            # roll window at expiry
+            if now >= self.rate_expiry:
+                self.rate_used = 0
+                self.rate_expiry = now + self.rate_window
+
+            self.rate_used += 1
+            headers = {
+                'X-Ratelimit-Allowed': str(self.rate_allowed),
+                'X-Ratelimit-Used': str(self.rate_used),
+                'X-Ratelimit-Available': str(max(self.rate_allowed - self.rate_used, 0)),
+                'X-Ratelimit-Expiry': str(int(self.rate_expiry * 1000))
+            }
+            limited = self.enforce_rate_limit and self.rate_used > self.rate_allowed
+
+        return headers, limited
+
+    def __simulate_latency(self):
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0: time.sleep(delay)
+
+    def __build_handler(self):
+        server = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                path = url.path[len(server.base_path):] if url.path.startswith(server.base_path) else url.path
+                params = dict(parse_qsl(url.query))
+                status, body, headers = server.handle_request(path, params)
+
+                # write response
+                body = body.encode('utf-8')
+                self.send_response(status)
+                if status == 200: self.send_header('Content-Type', 'application/json')
+                else: self.send_header('Content-Type', 'text/plain')
+                self.send_header('Content-Length', str(len(body)))
+                for k, v in headers.items(): self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return ReplayHandler
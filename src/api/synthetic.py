@@ -0,0 +1,176 @@
+from src.api.history import HistoryStore
+from datetime import date, timedelta
+from scipy.stats import norm
+import numpy as np
+import threading
+import json
+import time
+import zlib
+
+
+def synthetic_universe(n_symbols):
+    return ['SYN{}'.format(str(i).zfill(4)) for i in range(n_symbols)]
+
+
+def synthetic_closes(symbol, dates):
+
+    # seeded geometric random walk
+    rng = np.random.default_rng(zlib.crc32(symbol.encode('utf-8')))
+    start = rng.uniform(20.0, 400.0)
+    vol = rng.uniform(0.15, 0.6) / np.sqrt(252)
+    rets = rng.normal(0.0002, vol, dates.shape[0])
+    return start * np.exp(np.cumsum(rets))
+
+
+def synthetic_dates(n_days):
+    end = np.datetime64(date.today(), 'D')
+    start = np.busday_offset(end, -n_days, roll='forward')
+    days = np.arange(start, end, dtype='datetime64[D]')
+    return days[np.is_busday(days)]
+
+
+def write_synthetic_store(symbols, root='cache/history', n_days=300):
+    store = HistoryStore(root=root)
+    dates = synthetic_dates(n_days)
+
+    # write synced daily bars per symbol
+    for symbol in symbols:
+        closes = synthetic_closes(symbol, dates)
+        bars = np.zeros(dates.shape[0], dtype=HistoryStore.dtype)
+        bars['date'] = dates
+        bars['open'] = closes
+        bars['high'] = closes * 1.01
+        bars['low'] = closes * 0.99
+        bars['close'] = closes
+        bars['volume'] = 1e6
+        store.append(symbol, bars)
+
+    store.save_meta()
+    return store
+
+
+class SyntheticArchive:
+
+    def __init__(self,
+        n_strikes=40,
+        n_expirations=13,
+        n_days=300,
+        strike_range=0.3
+    ):
+
+        self.n_strikes = n_strikes
+        self.n_expirations = n_expirations
+        self.strike_range = strike_range
+        self.dates = synthetic_dates(n_days)
+
+        # weekly expirations from next friday
+        today = date.today()
+        friday = today + timedelta(days=(4 - today.weekday()) % 7 or 7)
+        self.expirations = [
+            str(friday + timedelta(weeks=i)) for i in range(n_expirations)
+        ]
+
+        # per-symbol request spans
+        self.lk = threading.Lock()
+        self.underlyings = {}
+        self.spans = {}
+        self.chain_count = 0
+
+    def lookup(self, path, params):
+        path = path.strip('/')
+        symbol = params.get('symbol')
+        try:
+
+            # build synthetic response
+            if path == 'options/expirations':
+                body = {'expirations': {'date': self.expirations}}
+            elif path == 'options/chains':
+                body = {'options': {'option': self.__build_chain(symbol, params['expiration'])}}
+            elif path == 'quotes':
+                quotes = [self.__build_quote(s) for s in params['symbols'].split(',')]
+                body = {'quotes': {'quote': quotes[0] if len(quotes) == 1 else quotes}}
+            else: return None
+
+        except Exception: return None
+        body = json.dumps(body, separators=(',', ':'))
+
+        # track symbol request span
+        if symbol is not None:
+            now = time.time()
+            with self.lk:
+                start, _ = self.spans.get(symbol, (now, now))
+                self.spans[symbol] = (start, now)
+                if path == 'options/chains': self.chain_count += 1
+
+        return body
+
+    def __underlying(self, symbol):
+        if symbol not in self.underlyings:
+            self.underlyings[symbol] = float(synthetic_closes(symbol, self.dates)[-1])
+        return self.underlyings[symbol]
+
+    def __build_quote(self, symbol):
+        last = round(self.__underlying(symbol), 2)
+        return {'symbol': symbol, 'last': last, 'bid': last, 'ask': last}
+
+    def __build_chain(self, symbol, expiration):
+        S = self.__underlying(symbol)
+        exp_dt = date.fromisoformat(expiration)
+        dte = max((exp_dt - date.today()).days, 1)
+        t = dte / 365.0
+        r = 0.01
+
+        # strike grid and smile
+        rng = np.random.default_rng(zlib.crc32((symbol + expiration).encode('utf-8')))
+        K = np.round(np.linspace(S * (1 - self.strike_range), S * (1 + self.strike_range), self.n_strikes), 1)
+        m = K / S - 1.0
+        sigma = rng.uniform(0.2, 0.5) * (1.0 - 0.3 * m + 1.5 * m ** 2)
+
+        # black-scholes prices & greeks
+        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * t) / (sigma * np.sqrt(t))
+        d2 = d1 - sigma * np.sqrt(t)
+        disc = np.exp(-r * t)
+        call = S * norm.cdf(d1) - K * disc * norm.cdf(d2)
+        put = K * disc * norm.cdf(-d2) - S * norm.cdf(-d1)
+        gamma = norm.pdf(d1) / (S * sigma * np.sqrt(t))
+        vega = S * norm.pdf(d1) * np.sqrt(t) / 100.0
+        volume = rng.integers(10, 5000, (2, self.n_strikes))
+        open_interest = rng.integers(10, 20000, (2, self.n_strikes))
+
+        # build tradier levels
+        chain = []
+        exp_label = exp_dt.strftime('%B %d %Y')
+        occ_date = exp_dt.strftime('%y%m%d')
+        for i in range(self.n_strikes):
+            for j, (option_type, price, delta) in enumerate([
+                ('put', put[i], norm.cdf(d1[i]) - 1.0),
+                ('call', call[i], norm.cdf(d1[i]))
+            ]):
+                price = max(float(price), 0.01)
+                chain.append({
+                    'symbol': '{}{}{}{}'.format(symbol, occ_date, option_type[0].upper(), str(int(K[i] * 1000)).zfill(8)),
+                    'description': '{} {} ${:.2f} {}'.format(symbol, exp_label, K[i], option_type.capitalize()),
+                    'root_symbol': symbol,
+                    'underlying': symbol,
+                    'option_type': option_type,
+                    'expiration_date': expiration,
+                    'strike': float(K[i]),
+                    'last': round(price, 2),
+                    'bid': round(price * 0.97, 2),
+                    'ask': round(price * 1.03, 2),
+                    'volume': int(volume[j, i]),
+                    'open_interest': int(open_interest[j, i]),
+                    'greeks': {
+                        'delta': float(delta),
+                        'gamma': float(gamma[i]),
+                        'theta': float(-S * norm.pdf(d1[i]) * sigma[i] / (2 * np.sqrt(t)) / 365.0),
+                        'vega': float(vega[i]),
+                        'rho': 0.0,
+                        'bid_iv': float(sigma[i] * 0.98),
+                        'mid_iv': float(sigma[i]),
+                        'ask_iv': float(sigma[i] * 1.02),
+                        'smv_vol': float(sigma[i])
+                    }
+                })
+
+        return chain
@@ -1,39 +1,107 @@
+from requests.adapters import HTTPAdapter
+from src.api.replay import ResponseRecorder
 from datetime import datetime
 import requests
+import json
+import time
 import os
 from dotenv import load_dotenv
 load_dotenv(verbose=True)
 
+# async client is optional
+try: import aiohttp
+except ImportError: aiohttp = None
+
+
+def format_contract_symbol(contract_string):
+
+    # convert description to occ symbol
+    contract_comps = contract_string.split(' ')
+    dt = datetime.strptime(' '.join(contract_comps[1:4]), '%B %d %Y')
+    return '{}{}{}{}{}{}'.format(
+        contract_comps[0],
+        str(dt.year)[-2:],
+        str(dt.month).zfill(2),
+        str(dt.day).zfill(2),
+        contract_comps[5][0].upper(),
+        str(int(float(contract_comps[4][1:]) * 1000)).zfill(8)
+    )
+
+
+def format_contract_symbols(contract_strings):
+    symbol_map = {}
+
+    # skip malformed descriptions
+    for contract_string in contract_strings:
+        try: symbol_map[format_contract_symbol(contract_string)] = contract_string
+        except Exception: continue
+
+    return symbol_map
+
 
 class TradierAPI:
 
+    def __init__(self,
+        connect_timeout=3.05,
+        read_timeout=15.0,
+        pool_size=10,
+        max_batch_size=100
+    ):
+
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.max_batch_size = max_batch_size
+
+        # prebuild request components
+        self.endpoint = os.environ.get('TRADIER_ENDPOINT')
+        self.headers = {
+            'Authorization': 'Bearer ' + os.environ.get('TRADIER_API_KEY', ''),
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        }
+
+        # record responses for offline replay
+        record_root = os.environ.get('TRADIER_RECORD')
+        if record_root: self.recorder = ResponseRecorder(record_root)
+        else: self.recorder = None
+
+        # build session lazily per process
+        self.session = None
+        self.session_pid = None
+
+    def __getstate__(self):
+
+        # never ship live sockets to other processes
+        state = self.__dict__.copy()
+        state['session'] = None
+        state['session_pid'] = None
+        return state
+
+    def close(self):
+
+        # flush recorded responses
+        if self.recorder is not None: self.recorder.close()
+
     def fetch_chain(self, symbol, expiration, greeks=True):
         try:
 
             # correct symbol
             symbol = symbol.replace('.', '/')
 
-            # format request
-            url = os.environ.get('TRADIER_ENDPOINT') + \
-                'options/chains?' + \
-                'symbol={}&'.format(symbol) + \
-                'expiration={}&'.format(expiration) + \
-                'greeks={}'.format(str(greeks).lower())
-            headers = {
-                'Authorization': 'Bearer ' + os.environ.get('TRADIER_API_KEY'), 
-                'Accept': 'application/json'
-            }
-
             # send request
-            r_data = requests.get(url, headers=headers)
+            r_data = self.__send_request('options/chains', {
+                'symbol': symbol,
+                'expiration': expiration,
+                'greeks': str(greeks).lower()
+            })
             chain = r_data.json()['options']['option']
-            rate_available = int(r_data.headers['X-Ratelimit-Available'])
-            rate_allowed = int(r_data.headers['X-Ratelimit-Allowed'])
-            rate_expiry = int(r_data.headers['X-Ratelimit-Expiry'])
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_data)
 
         except: return None
         return (
-            chain, 
+            chain,
             rate_available,
             rate_allowed,
             rate_expiry
@@ -45,25 +113,16 @@ class TradierAPI:
             # correct symbol
             symbol = symbol.replace('.', '/')
 
-            # format request
-            url = os.environ.get('TRADIER_ENDPOINT') + \
-                'options/expirations?' + \
-                'symbol={}'.format(symbol)
-            headers = {
-                'Authorization': 'Bearer ' + os.environ.get('TRADIER_API_KEY'), 
-                'Accept': 'application/json'
-            }
-
             # send request
-            r_data = requests.get(url, headers=headers)
+            r_data = self.__send_request('options/expirations', {
+                'symbol': symbol
+            })
             expirations = r_data.json()['expirations']['date']
-            rate_available = int(r_data.headers['X-Ratelimit-Available'])
-            rate_allowed = int(r_data.headers['X-Ratelimit-Allowed'])
-            rate_expiry = int(r_data.headers['X-Ratelimit-Expiry'])
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_data)
 
         except: return None
         return (
-            expirations, 
+            expirations,
             rate_available,
             rate_allowed,
             rate_expiry
@@ -74,26 +133,17 @@ class TradierAPI:
 
             # correct symbol
             symbol = symbol.replace('.', '/')
-            
-            # format request
-            url = os.environ.get('TRADIER_ENDPOINT') + \
-                'quotes?' + \
-                'symbols={}'.format(symbol)
-            headers = {
-                'Authorization': 'Bearer ' + os.environ.get('TRADIER_API_KEY'), 
-                'Accept': 'application/json'
-            }
 
             # send request
-            r_data = requests.get(url, headers=headers)
+            r_data = self.__send_request('quotes', {
+                'symbols': symbol
+            })
             underlying = r_data.json()['quotes']['quote']
-            rate_available = int(r_data.headers['X-Ratelimit-Available'])
-            rate_allowed = int(r_data.headers['X-Ratelimit-Allowed'])
-            rate_expiry = int(r_data.headers['X-Ratelimit-Expiry'])
-            
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_data)
+
         except: return None
         return (
-            underlying, 
+            underlying,
             rate_available,
             rate_allowed,
             rate_expiry
@@ -103,38 +153,351 @@ class TradierAPI:
         try:
 
             # format contract symbol
-            contract_comps = contract_string.split(' ')
-            dt = datetime.strptime(' '.join(contract_comps[1:4]), '%B %d %Y')
-            contract_symbol = '{}{}{}{}{}{}'.format(
-                contract_comps[0],
-                str(dt.year)[-2:],
-                str(dt.month).zfill(2),
-                str(dt.day).zfill(2),
-                contract_comps[5][0].upper(),
-                str(int(float(contract_comps[4][1:]) * 1000)).zfill(8)
-            )
-
-            # format request
-            url = os.environ.get('TRADIER_ENDPOINT') + \
-                'quotes?' + \
-                'symbols={}&'.format(contract_symbol) + \
-                'greeks=false'
-            headers = {
-                'Authorization': 'Bearer ' + os.environ.get('TRADIER_API_KEY'), 
-                'Accept': 'application/json'
-            }
+            contract_symbol = format_contract_symbol(contract_string)
 
             # send request
-            r_data = requests.get(url, headers=headers)
+            r_data = self.__send_request('quotes', {
+                'symbols': contract_symbol,
+                'greeks': 'false'
+            })
             contract_quote = r_data.json()['quotes']['quote']
-            rate_available = int(r_data.headers['X-Ratelimit-Available'])
-            rate_allowed = int(r_data.headers['X-Ratelimit-Allowed'])
-            rate_expiry = int(r_data.headers['X-Ratelimit-Expiry'])
-            
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_data)
+
         except: return None
         return (
-            contract_quote, 
+            contract_quote,
             rate_available,
             rate_allowed,
             rate_expiry
-        )
\ No newline at end of file
+        )
+
+    def fetch_underlyings(self, symbols):
+        try:
+
+            # correct symbols
+            symbol_map = {s.replace('.', '/'): s for s in symbols}
+
+            # send batched requests
+            quotes, r_data = self.__send_quotes_request(list(symbol_map.keys()), {})
+            underlyings = {symbol_map[q['symbol']]: q for q in quotes if q['symbol'] in symbol_map}
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_data)
+
+        except: return None
+        return (
+            underlyings,
+            rate_available,
+            rate_allowed,
+            rate_expiry
+        )
+
+    def fetch_contracts(self, contract_strings):
+        try:
+
+            # format contract symbols
+            symbol_map = format_contract_symbols(contract_strings)
+
+            # send batched requests
+            quotes, r_data = self.__send_quotes_request(list(symbol_map.keys()), {
+                'greeks': 'false'
+            })
+            contract_quotes = {symbol_map[q['symbol']]: q for q in quotes if q['symbol'] in symbol_map}
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_data)
+
+        except: return None
+        return (
+            contract_quotes,
+            rate_available,
+            rate_allowed,
+            rate_expiry
+        )
+
+    def __send_quotes_request(self, symbols, params):
+        quotes, r_data = [], None
+
+        # chunk comma-separated symbols
+        for i in range(0, len(symbols), self.max_batch_size):
+            batch_params = dict(params, symbols=','.join(symbols[i:i + self.max_batch_size]))
+
+            # leave failed batches missing
+            try:
+                r_batch = self.__send_request('quotes', batch_params)
+                batch = r_batch.json()['quotes'].get('quote', [])
+            except Exception: continue
+            if isinstance(batch, dict): batch = [batch]
+            quotes.extend(batch)
+            r_data = r_batch
+
+        return quotes, r_data
+
+    def __send_request(self, path, params):
+        session = self.__get_session()
+        start = time.time()
+        r_data = session.get(
+            self.endpoint + path,
+            params=params,
+            timeout=(self.connect_timeout, self.read_timeout)
+        )
+
+        # capture raw response
+        if self.recorder is not None:
+            self.recorder.record(path, params, r_data.status_code, 
+                r_data.headers, r_data.text, time.time() - start)
+
+        # reject throttled/failed responses
+        r_data.raise_for_status()
+        return r_data
+
+    def __get_session(self):
+
+        # rebuild pool after fork/spawn
+        pid = os.getpid()
+        if self.session is not None and self.session_pid == pid:
+            return self.session
+
+        # build keep-alive connection pool
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=0
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(self.headers)
+
+        self.session = session
+        self.session_pid = pid
+        return session
+
+    def __parse_rate_limit(self, r_data):
+        return (
+            int(r_data.headers['X-Ratelimit-Available']),
+            int(r_data.headers['X-Ratelimit-Allowed']),
+            int(r_data.headers['X-Ratelimit-Expiry'])
+        )
+
+
+class AsyncTradierAPI:
+
+    def __init__(self,
+        connect_timeout=3.05,
+        read_timeout=15.0,
+        max_connections=100,
+        max_batch_size=100
+    ):
+
+        if aiohttp is None: raise Exception('Async fetch requires aiohttp.')
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_connections = max_connections
+        self.max_batch_size = max_batch_size
+
+        # prebuild request components
+        self.endpoint = os.environ.get('TRADIER_ENDPOINT')
+        self.headers = {
+            'Authorization': 'Bearer ' + os.environ.get('TRADIER_API_KEY', ''),
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate'
+        }
+
+        # record responses for offline replay
+        record_root = os.environ.get('TRADIER_RECORD')
+        if record_root: self.recorder = ResponseRecorder(record_root)
+        else: self.recorder = None
+
+        # build session inside running loop
+        self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        if self.session is not None: return
+
+        # build keep-alive connection pool
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=self.connect_timeout,
+            sock_read=self.read_timeout
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers=self.headers
+        )
+
+    async def close(self):
+        if self.recorder is not None: self.recorder.close()
+        if self.session is None: return
+        await self.session.close()
+        self.session = None
+
+    async def fetch_chain(self, symbol, expiration, greeks=True):
+        try:
+
+            # correct symbol
+            symbol = symbol.replace('.', '/')
+
+            # send request
+            r_json, r_headers = await self.__send_request('options/chains', {
+                'symbol': symbol,
+                'expiration': expiration,
+                'greeks': str(greeks).lower()
+            })
+            chain = r_json['options']['option']
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_headers)
+
+        except: return None
+        return (
+            chain,
+            rate_available,
+            rate_allowed,
+            rate_expiry
+        )
+
+    async def fetch_expirations(self, symbol):
+        try:
+
+            # correct symbol
+            symbol = symbol.replace('.', '/')
+
+            # send request
+            r_json, r_headers = await self.__send_request('options/expirations', {
+                'symbol': symbol
+            })
+            expirations = r_json['expirations']['date']
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_headers)
+
+        except: return None
+        return (
+            expirations,
+            rate_available,
+            rate_allowed,
+            rate_expiry
+        )
+
+    async def fetch_underlying(self, symbol):
+        try:
+
+            # correct symbol
+            symbol = symbol.replace('.', '/')
+
+            # send request
+            r_json, r_headers = await self.__send_request('quotes', {
+                'symbols': symbol
+            })
+            underlying = r_json['quotes']['quote']
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_headers)
+
+        except: return None
+        return (
+            underlying,
+            rate_available,
+            rate_allowed,
+            rate_expiry
+        )
+
+    async def fetch_contract(self, contract_string):
+        try:
+
+            # format contract symbol
+            contract_symbol = format_contract_symbol(contract_string)
+
+            # send request
+            r_json, r_headers = await self.__send_request('quotes', {
+                'symbols': contract_symbol,
+                'greeks': 'false'
+            })
+            contract_quote = r_json['quotes']['quote']
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_headers)
+
+        except: return None
+        return (
+            contract_quote,
+            rate_available,
+            rate_allowed,
+            rate_expiry
+        )
+
+    async def fetch_underlyings(self, symbols):
+        try:
+
+            # correct symbols
+            symbol_map = {s.replace('.', '/'): s for s in symbols}
+
+            # send batched requests
+            quotes, r_headers = await self.__send_quotes_request(list(symbol_map.keys()), {})
+            underlyings = {symbol_map[q['symbol']]: q for q in quotes if q['symbol'] in symbol_map}
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_headers)
+
+        except: return None
+        return (
+            underlyings,
+            rate_available,
+            rate_allowed,
+            rate_expiry
+        )
+
+    async def fetch_contracts(self, contract_strings):
+        try:
+
+            # format contract symbols
+            symbol_map = format_contract_symbols(contract_strings)
+
+            # send batched requests
+            quotes, r_headers = await self.__send_quotes_request(list(symbol_map.keys()), {
+                'greeks': 'false'
+            })
+            contract_quotes = {symbol_map[q['symbol']]: q for q in quotes if q['symbol'] in symbol_map}
+            rate_available, rate_allowed, rate_expiry = self.__parse_rate_limit(r_headers)
+
+        except: return None
+        return (
+            contract_quotes,
+            rate_available,
+            rate_allowed,
+            rate_expiry
+        )
+
+    async def __send_quotes_request(self, symbols, params):
+        quotes, r_headers = [], None
+
+        # chunk comma-separated symbols
+        for i in range(0, len(symbols), self.max_batch_size):
+            batch_params = dict(params, symbols=','.join(symbols[i:i + self.max_batch_size]))
+
+            # leave failed batches missing
+            try:
+                r_json, r_batch_headers = await self.__send_request('quotes', batch_params)
+                batch = r_json['quotes'].get('quote', [])
+            except Exception: continue
+            if isinstance(batch, dict): batch = [batch]
+            quotes.extend(batch)
+            r_headers = r_batch_headers
+
+        return quotes, r_headers
+
+    async def __send_request(self, path, params):
+        start = time.time()
+        async with self.session.get(self.endpoint + path, params=params) as r_data:
+            r_text = await r_data.text()
+
+            # capture raw response
+            if self.recorder is not None:
+                self.recorder.record(path, params, r_data.status, 
+                    r_data.headers, r_text, time.time() - start)
+
+            # reject throttled/failed responses
+            r_data.raise_for_status()
+            return json.loads(r_text), r_data.headers
+
+    def __parse_rate_limit(self, r_headers):
+        return (
+            int(r_headers['X-Ratelimit-Available']),
+            int(r_headers['X-Ratelimit-Allowed']),
+            int(r_headers['X-Ratelimit-Expiry'])
+        )
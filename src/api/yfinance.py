@@ -1,7 +1,8 @@
+from src.api.history import PriceHistory, HistoryStore
+import numpy as np
 import os
-import requests
 import yfinance as yf
-from datetime import datetime
+from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
 from dotenv import load_dotenv
 load_dotenv(verbose=True)
@@ -9,6 +10,26 @@ load_dotenv(verbose=True)
 
 class YFinanceAPI:
 
+    def __init__(self,
+        chunk_size=100,
+        max_fetch_attempts=5,
+        use_store=True,
+        live_quotes=None,
+        adjust_overlap=7
+    ):
+
+        self.chunk_size = chunk_size
+        self.max_fetch_attempts = max_fetch_attempts
+        self.adjust_overlap = adjust_overlap
+
+        # default live session quotes from env
+        if live_quotes is None: live_quotes = os.environ.get('YFINANCE_LIVE_QUOTES', '1') != '0'
+        self.live_quotes = live_quotes
+
+        # load history store
+        if use_store: self.store = HistoryStore()
+        else: self.store = None
+
     def fetch_last_quote(self, symbol):
         try:
 
@@ -20,14 +41,159 @@ class YFinanceAPI:
         except: return None
         return round(last_quote, 2)
 
-    def fetch_year_quotes(self, symbol):
+    def fetch_universe_closes(self, symbols, index='SPY'):
         try:
-
-            # get year quotes
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period='1y', interval='1d')
-            data = data[['Open', 'High', 'Low', 'Close', 'Volume']]
-            data.columns = ['open', 'high', 'low', 'close', 'volume']
-            year_quotes = data.to_dict(orient='records')
+            symbols = [index] + [s for s in dict.fromkeys(symbols) if s != index]
+            if self.store is not None: history = self.__load_universe_closes(symbols)
+            else: history = self.__download_universe_closes(symbols)
         except: return None
-        return year_quotes
\ No newline at end of file
+        return history
+
+    def __download_universe_closes(self, symbols):
+
+        # build index calendar
+        index_closes = self.__download_bars(symbols[:1], period='1y')['Close']
+        dates = index_closes[symbols[0]].dropna().index
+        closes = np.full((dates.shape[0], len(symbols)), np.nan)
+        closes[:, 0] = index_closes[symbols[0]].reindex(dates).values
+
+        # download chunked universe
+        for i in range(1, len(symbols), self.chunk_size):
+            chunk = symbols[i:i + self.chunk_size]
+            chunk_bars = self.__download_bars(chunk, period='1y')
+            if chunk_bars is None: continue
+
+            # align chunk to index calendar
+            chunk_closes = chunk_bars['Close'].reindex(dates)
+            for j, symbol in enumerate(chunk):
+                if symbol in chunk_closes.columns:
+                    closes[:, i + j] = chunk_closes[symbol].values
+
+        dates = dates.values.astype('datetime64[D]')
+        return PriceHistory(dates, symbols, closes, symbols[0])
+
+    def __load_universe_closes(self, symbols):
+        self.__sync_store(symbols)
+
+        # build index calendar
+        index_bars = self.store.load(symbols[0])
+        dates = index_bars['date'][index_bars['date'] >= self.__year_start()]
+
+        # extend calendar with live session
+        today = np.datetime64(date.today(), 'D')
+        live_closes = self.__download_live_closes(symbols) if self.live_quotes else {}
+        if symbols[0] in live_closes: dates = np.append(dates, today)
+
+        # align stored bars to index calendar
+        closes = np.full((dates.shape[0], len(symbols)), np.nan)
+        for j, symbol in enumerate(symbols):
+            bars = self.store.load(symbol)
+            if bars is not None and bars.shape[0] > 0:
+                pos = np.minimum(np.searchsorted(bars['date'], dates), bars.shape[0] - 1)
+                match = bars['date'][pos] == dates
+                closes[match, j] = bars['close'][pos[match]]
+            if symbol in live_closes and dates[-1] == today:
+                closes[-1, j] = live_closes[symbol]
+
+        return PriceHistory(dates, symbols, closes, symbols[0])
+
+    def __sync_store(self, symbols):
+        today = date.today()
+
+        # group stale symbols by resume date
+        groups = {}
+        for symbol in symbols:
+            if self.store.is_synced(symbol): continue
+            last_date = self.store.last_date(symbol)
+            if last_date is None: start = self.__history_start()
+
+            # overlap stored bars to detect corporate actions
+            else: start = last_date.astype(date) + timedelta(days=1 - self.adjust_overlap)
+            groups.setdefault(start, []).append(symbol)
+
+        # download missing bars
+        adjusted = []
+        for start, group in groups.items():
+            for i in range(0, len(group), self.chunk_size):
+                chunk = group[i:i + self.chunk_size]
+
+                # allow empty weekend/holiday gaps
+                allow_empty = (today - start).days <= 4 + self.adjust_overlap
+                chunk_bars = self.__download_bars(chunk, allow_empty, start=str(start))
+                if chunk_bars is None: continue
+                for symbol in chunk:
+                    if not self.store.append(symbol, self.__to_records(chunk_bars, symbol), allow_empty):
+                        adjusted.append(symbol)
+
+        # rewrite series adjusted since last sync
+        for i in range(0, len(adjusted), self.chunk_size):
+            chunk = adjusted[i:i + self.chunk_size]
+            chunk_bars = self.__download_bars(chunk, start=str(self.__history_start()))
+            if chunk_bars is None: continue
+            for symbol in chunk:
+                self.store.rewrite(symbol, self.__to_records(chunk_bars, symbol))
+
+        if len(groups) > 0: self.store.save_meta()
+
+    def __download_live_closes(self, symbols):
+        today = np.datetime64(date.today(), 'D')
+        live_closes = {}
+
+        # download current session bars
+        for i in range(0, len(symbols), self.chunk_size):
+            chunk_bars = self.__download_bars(symbols[i:i + self.chunk_size], period='1d')
+            if chunk_bars is None: continue
+            chunk_closes = chunk_bars['Close']
+            chunk_dates = chunk_closes.index.values.astype('datetime64[D]')
+            for symbol in chunk_closes.columns:
+                close = chunk_closes[symbol].values[chunk_dates == today]
+                if close.shape[0] > 0 and not np.isnan(close[-1]):
+                    live_closes[symbol] = float(close[-1])
+
+        return live_closes
+
+    def __download_bars(self, symbols, allow_empty=False, **period_kwargs):
+        attempts = 0
+
+        # retry bulk download
+        while attempts < self.max_fetch_attempts:
+            attempts += 1
+            try:
+                data = yf.download(
+                    tickers=' '.join(symbols),
+                    interval='1d',
+                    group_by='column',
+                    auto_adjust=True,
+                    threads=True,
+                    progress=False,
+                    **period_kwargs
+                )
+                bars = {f: data[f] for f in ['Open', 'High', 'Low', 'Close', 'Volume']}
+            except: continue
+
+            # normalize single-ticker frames
+            for f, frame in bars.items():
+                if frame.ndim == 1: bars[f] = frame.to_frame(name=symbols[0])
+            if data.shape[0] > 0 or allow_empty: return bars
+
+        return None
+
+    def __to_records(self, bars, symbol):
+        if bars is None or symbol not in bars['Close'].columns:
+            return np.zeros(0, dtype=HistoryStore.dtype)
+
+        # convert symbol bars to store records
+        closes = bars['Close'][symbol]
+        mask = closes.notna().values
+        records = np.zeros(mask.sum(), dtype=HistoryStore.dtype)
+        records['date'] = closes.index.values[mask].astype('datetime64[D]')
+        for f in HistoryStore.fields:
+            records[f] = bars[f.capitalize()][symbol].values[mask]
+
+        return records
+
+    def __history_start(self):
+        return self.__year_start().astype(date) - timedelta(days=7)
+
+    def __year_start(self):
+        return np.datetime64(date.today() - relativedelta(years=1), 'D')
@@ -0,0 +1,223 @@
+from src.api.synthetic import SyntheticArchive, synthetic_universe, write_synthetic_store
+from src.scanner.cps import CreditPutSpreadScanner
+from src.scanner.wheelput import WheelPutScanner
+from src.scanner.gamma import GammaScanner
+from src.scanner.multi import MultiStrategyScanner
+from src.executor.scan import ScanExecutor
+from src.api.replay import ReplayServer
+from datetime import datetime, date
+from pathlib import Path
+import multiprocessing
+import pandas as pd
+import numpy as np
+import subprocess
+import itertools
+import resource
+import tempfile
+import shutil
+import pickle
+import json
+import time
+import os
+
+
+def serve_synthetic_archive(conn, archive_kwargs, server_kwargs):
+    archive = SyntheticArchive(**archive_kwargs)
+    server = ReplayServer(archive, port=0, **server_kwargs).start()
+    conn.send(server.endpoint)
+
+    # serve until stopped
+    conn.recv()
+    server.stop()
+    conn.send({
+        'api_requests': server.request_count,
+        'api_bytes': server.byte_count,
+        'chain_count': archive.chain_count,
+        'spans': archive.spans
+    })
+
+
+def count_results(results):
+    if isinstance(results, np.ndarray): return len(results)
+    return sum(len(v) for v in results.values())
+
+
+def run_benchmark_case(result_queue, endpoint, scanner, n_symbols, num_processes, async_fetch):
+    workspace = tempfile.mkdtemp(prefix='bench_')
+    os.chdir(workspace)
+    try:
+
+        # build synthetic workspace
+        symbols = synthetic_universe(n_symbols)
+        write_synthetic_store(['SPY'] + symbols)
+        f = open('cache/ycharts.json', 'w+')
+        json.dump({'risk_free_rate': 0.01, 'updated_at': date.today().strftime('%Y-%m-%d')}, f)
+        f.close()
+
+        # route apis to stand-in server
+        os.environ['TRADIER_ENDPOINT'] = endpoint
+        os.environ['YFINANCE_LIVE_QUOTES'] = '0'
+
+        # load scanner
+        scan_kwargs = {
+            'uni_list': symbols,
+            'num_processes': num_processes,
+            'save_scan': False,
+            'log_changes': False,
+            'prog_bar': False,
+            'async_fetch': async_fetch,
+            'use_cache': False
+        }
+        if scanner == 'cps': s = CreditPutSpreadScanner(**scan_kwargs)
+        elif scanner == 'gamma': s = GammaScanner(**scan_kwargs)
+        elif scanner == 'multi': s = MultiStrategyScanner(price_cap=1000.0, **scan_kwargs)
+        elif scanner == 'executor':
+            scan_kwargs.update(ScanExecutor().put_selection_kwargs(0.2, 0.25))
+            s = WheelPutScanner(price_cap=1000.0, **scan_kwargs)
+        else: s = WheelPutScanner(price_cap=1000.0, **scan_kwargs)
+
+        # time scan
+        start = time.perf_counter()
+        scan = s.run()
+        if scanner == 'executor':
+            forecast_df = pd.DataFrame(np.nan, index=symbols, columns=range(3))
+            ScanExecutor().compile_put_scan(scan['results'], scan['symbols'], symbols, forecast_df, 0.2, 0.25)
+        elapsed = time.perf_counter() - start
+
+        # gather per-strategy result sets
+        if scanner == 'multi': results = [scan[k]['results'] for k in ['wheelput', 'cps', 'gamma']]
+        else: results = [scan['results']]
+
+        # collect process metrics
+        result_queue.put({
+            'elapsed': elapsed,
+            'result_count': sum(count_results(r) for r in results),
+            'result_pickle_bytes': sum(len(pickle.dumps(r)) for r in results),
+            'fetch_failure_count': scan['fetch_failure_count'],
+            'analysis_failure_count': scan['analysis_failure_count'],
+            'parent_peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+            'worker_peak_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024.0
+        })
+
+    except Exception as e: result_queue.put({'error': str(e)})
+    finally: shutil.rmtree(workspace, ignore_errors=True)
+
+
+class BenchmarkExecutor:
+
+    def __init__(self,
+        scanners=('wheelput', 'cps', 'gamma', 'executor'),
+        symbol_counts=(10, 100),
+        strike_counts=(40,),
+        expiration_counts=(13,),
+        worker_counts=(6,),
+        latencies=(0.05,),
+        jitter=0.0,
+        error_rate=0.0,
+        rate_allowed=1000000,
+        rate_window=1.0,
+        async_fetch=False,
+        output_file=None
+    ):
+
+        self.scanners = scanners
+        self.symbol_counts = symbol_counts
+        self.strike_counts = strike_counts
+        self.expiration_counts = expiration_counts
+        self.worker_counts = worker_counts
+        self.latencies = latencies
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_allowed = rate_allowed
+        self.rate_window = rate_window
+        self.async_fetch = async_fetch
+        self.output_file = output_file
+
+        # build output name
+        if self.output_file is None:
+            d = str(datetime.today()).split(' ')[0]
+            t = str(datetime.today()).split(' ')[-1].split('.')[0]
+            self.output_file = 'bench/bench_{}_{}.json'.format(d, t)
+
+    def run(self):
+        cases = []
+
+        # run benchmark grid
+        for scanner, n_symbols, n_strikes, n_expirations, num_processes, latency in itertools.product(
+            self.scanners, self.symbol_counts, self.strike_counts,
+            self.expiration_counts, self.worker_counts, self.latencies):
+            case = self.run_case(scanner, n_symbols, n_strikes, n_expirations, num_processes, latency)
+            print(json.dumps(case), flush=True)
+            cases.append(case)
+
+        # save results
+        Path(self.output_file).parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.output_file, 'w+')
+        json.dump({
+            'commit': self.__fetch_commit(),
+            'created_at': str(datetime.today()),
+            'cases': cases
+        }, f, indent=2)
+        f.close()
+
+        return cases
+
+    def run_case(self, scanner, n_symbols, n_strikes, n_expirations, num_processes, latency):
+        case = {
+            'scanner': scanner,
+            'symbols': n_symbols,
+            'strikes': n_strikes,
+            'expirations': n_expirations,
+            'workers': num_processes,
+            'latency': latency,
+            'async_fetch': self.async_fetch
+        }
+
+        # start stand-in server
+        server_conn, conn = multiprocessing.Pipe()
+        server = multiprocessing.Process(target=serve_synthetic_archive, args=(conn, {
+            'n_strikes': n_strikes,
+            'n_expirations': n_expirations
+        }, {
+            'latency': latency,
+            'jitter': self.jitter,
+            'error_rate': self.error_rate,
+            'rate_allowed': self.rate_allowed,
+            'rate_window': self.rate_window
+        }))
+        server.start()
+        endpoint = server_conn.recv()
+
+        # run case in fresh process
+        result_queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=run_benchmark_case, args=(
+            result_queue, endpoint, scanner, n_symbols, num_processes, self.async_fetch))
+        process.start()
+        metrics = result_queue.get()
+        process.join()
+
+        # stop stand-in server
+        server_conn.send(None)
+        server_stats = server_conn.recv()
+        server.join()
+        case.update(metrics)
+        if 'error' in metrics: return case
+
+        # compile throughput & latency
+        elapsed = metrics['elapsed']
+        spans = np.array([end - start for start, end in server_stats['spans'].values()])
+        if spans.shape[0] == 0: spans = np.zeros(1)
+        case.update({
+            'symbols_per_sec': round(n_symbols / elapsed, 3),
+            'chains_per_sec': round(server_stats['chain_count'] / elapsed, 3),
+            'symbol_latency_p50': round(float(np.percentile(spans, 50)), 4),
+            'symbol_latency_p99': round(float(np.percentile(spans, 99)), 4),
+            'api_requests': server_stats['api_requests'],
+            'api_bytes': server_stats['api_bytes']
+        })
+
+        return case
+
+    def __fetch_commit(self):
+        try: return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD']).decode().strip()
+        except: return None
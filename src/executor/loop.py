@@ -2,7 +2,6 @@ from src.executor.portfolio import PortfolioExecutor
 from src.executor.scan import ScanExecutor
 from src.util.slack import SlackTextSender
 from tabulate import tabulate
-from functools import reduce
 import datetime as dt
 import numpy as np
 import time
@@ -40,27 +39,28 @@ class LoopMonitorExecutor:
         try:
             while True:
 
-                # scan targets contracts
+                # scan portfolio
                 os.system('clear')
-                print('Running put scan... ', end='', flush=True)
                 now = time.time()
+                portfolio_scan = self.portfolio_executor.run_portfolio_read(
+                    print_results=False,
+                    print_general_stats=False,
+                    return_results=True
+                )
+
+                # scan targets contracts with mid-scan alerts
+                print('Running put scan... ', end='', flush=True)
                 put_scan = self.scan_executor.run_put_scanner(
                     ignore_active_tickers=False,
                     print_results=False,
                     refresh_results=False,
                     return_results=True,
+                    on_update=lambda df: self.notify_contract_scan(self.filter_put_scan(df, portfolio_scan)),
                     prog_bar=False
                 )
 
-                # scan portfolio
-                print('Done', flush=True)
-                portfolio_scan = self.portfolio_executor.run_portfolio_read(
-                    print_results=False,
-                    print_general_stats=False,
-                    return_results=True
-                )
-
                 # execute scans
+                print('Done', flush=True)
                 print('Running portfolio scan... ', end='', flush=True)
                 put_scan = self.filter_put_scan(put_scan, portfolio_scan)
                 self.notify_contract_scan(put_scan)
@@ -100,9 +100,7 @@ class LoopMonitorExecutor:
 
         # filter put scan tickers
         if len(tickers) == 0: return put_scan
-        masks = [put_scan.index.str.startswith(t) for t in tickers]
-        mask = reduce(lambda x, y: x | y, masks)
-        updated_put_scan = put_scan[~mask]
+        updated_put_scan = put_scan[~put_scan['symbol'].isin(tickers)]
         
         return updated_put_scan 
 
@@ -122,7 +120,7 @@ class LoopMonitorExecutor:
 
             # draft alert messages
             score = put_scan.loc[contract, 'score (%)']
-            ticker = str(contract).split(' ')[0]
+            ticker = put_scan.loc[contract, 'symbol']
             subject = 'ALERT: {} High Score'.format(ticker)
             text = 'Put scan at {} revealed a score of {}% for the contract {}.'.format(
                 cur_time, 
@@ -166,7 +164,7 @@ class LoopMonitorExecutor:
             self.lifetime_notifications[contract] = time.time()
 
     def print_results(self, put_scan, portfolio_scan):
-        formatted_put_scan = tabulate(put_scan, headers='keys', tablefmt='psql')
+        formatted_put_scan = tabulate(put_scan.drop(columns='symbol'), headers='keys', tablefmt='psql')
         formatted_portfolio_scan = tabulate(portfolio_scan, headers='keys', tablefmt='psql')
 
         print(flush=True)
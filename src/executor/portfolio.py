@@ -20,85 +20,83 @@ class PortfolioExecutor:
                            return_results=False,
                            min_close_days=3):
 
-        contract_data = [[], [], [], [], [], [], [], [], [], [], []] 
         api = TradierAPI()
-        portfolio_pl = 0
-        max_portfolio_pl = 0
-        cash_util = 0
 
         # load portfolio
         sheets_extractor = SheetsPortfolioExtractor()
         portfolio_df = sheets_extractor.fetch('\'Active Positions\'!B5:R1000')
         portfolio_df = portfolio_df[portfolio_df['Stage (F)'] != 'Done']
-
-        # analyze contract data
-        for _, contract in portfolio_df.iterrows():
-            contract_string = contract['Contract (F)']
-            qty = self.num_to_float(contract['Quantity (F)'])
-            sell_price = self.num_to_float(contract['Premium']) / 100.0 / qty
-            contract_comps = contract_string.split(' ')
-
-            # get quotes
-            underlying_quote = api.fetch_underlying(contract_comps[0])[0]['last']
-            contract_query = api.fetch_contract(contract_string)
-            contract_last = np.nan if contract_query is None else contract_query[0]['last']
-            contract_ask = np.nan if contract_query is None else contract_query[0]['ask']
-            contract_data[0].append(round(underlying_quote, 2))
-            contract_data[1].append(round(contract_last, 2))
-
-            # get dte
-            dt = datetime.strptime(' '.join(contract_comps[1:4]), '%B %d %Y').date()
-            dte = (dt - date.today()).days
-            contract_data[2].append(dte)
-
-            # get strike
-            strike = self.num_to_float(contract_comps[4])
-            moneyness = strike / underlying_quote
-            if np.abs(1.0 - moneyness) <= 0.015: moneyness_status = 'ATM'
-            elif contract_comps[5] == 'Put' and moneyness < 1.0: moneyness_status = 'OTM'
-            elif contract_comps[5] == 'Call' and moneyness > 1.0: moneyness_status = 'OTM'
-            else: moneyness_status = 'ITM'
-            contract_data[3].append(strike - sell_price)
-            contract_data[4].append(round(moneyness * 100, 2))
-            contract_data[5].append(moneyness_status)
-
-            # get return and p/l
-            ret = (sell_price - contract_ask) / sell_price
-            pl = (sell_price - contract_ask) * 100 * qty
-            contract_data[6].append(round(ret * 100, 2))
-            contract_data[7].append(pl)
-            contract_data[8].append(contract_ask)
-
-            # get tied-up capital
-            tuc = self.num_to_float(contract['Tied-Up Capital (F)'])
-
-            # calculate annualized ROCs
-            a_roc = float(contract['Annualized ROC'][:-1]) / 100
-            contract_data[9].append(round(a_roc * 100, 2))
-            close_ret = ((sell_price - contract_ask) * qty * 100) / tuc
-            dt = datetime.strptime(contract['Date Opened (F)'], '%m/%d/%Y').date()
-            dse = (date.today() - dt).days
-            if dse < min_close_days or contract_comps[5] == 'Call': 
-                cur_a_roc = 0
-            else:
-                try: cur_a_roc = (1 + close_ret) ** (365.2425 / dse) - 1
-                except: cur_a_roc = float('inf')
-            contract_data[10].append(round(cur_a_roc * 100, 2))
- 
-            # update general stats
-            if contract_comps[5] == 'Put': portfolio_pl += pl
-            max_portfolio_pl += sell_price * 100 * qty
-            cash_util += tuc
+        contract_strings = portfolio_df['Contract (F)'].values.tolist()
+        contract_comps = [c.split(' ') for c in contract_strings]
+        tickers = [c[0] for c in contract_comps]
+
+        # batch fetch quotes
+        underlying_query = api.fetch_underlyings(sorted(set(tickers)))
+        contract_query = api.fetch_contracts(contract_strings)
+        api.close()
+        underlyings = {} if underlying_query is None else underlying_query[0]
+        contracts = {} if contract_query is None else contract_query[0]
+
+        # get quotes
+        underlying_quote = np.array([underlyings[t]['last'] if t in underlyings 
+            else np.nan for t in tickers], dtype=np.float64)
+        contract_last = np.array([contracts[c]['last'] if c in contracts 
+            else np.nan for c in contract_strings], dtype=np.float64)
+        contract_ask = np.array([contracts[c]['ask'] if c in contracts 
+            else np.nan for c in contract_strings], dtype=np.float64)
+
+        # get position sizes
+        qty = portfolio_df['Quantity (F)'].map(self.num_to_float).values
+        sell_price = portfolio_df['Premium'].map(self.num_to_float).values / 100.0 / qty
+        tuc = portfolio_df['Tied-Up Capital (F)'].map(self.num_to_float).values
+
+        # get dte
+        today = date.today()
+        dte = np.array([(datetime.strptime(' '.join(c[1:4]), '%B %d %Y').date() - today).days
+            for c in contract_comps])
+
+        # get strike
+        strike = np.array([self.num_to_float(c[4]) for c in contract_comps])
+        is_put = np.array([c[5] == 'Put' for c in contract_comps])
+        is_call = np.array([c[5] == 'Call' for c in contract_comps])
+        moneyness = strike / underlying_quote
+        otm_mask = (is_put & (moneyness < 1.0)) | (is_call & (moneyness > 1.0))
+        moneyness_status = np.where(np.abs(1.0 - moneyness) <= 0.015, 'ATM', 
+            np.where(otm_mask, 'OTM', 'ITM'))
+
+        # get return and p/l
+        ret = (sell_price - contract_ask) / sell_price
+        pl = (sell_price - contract_ask) * 100 * qty
+
+        # calculate annualized ROCs
+        a_roc = portfolio_df['Annualized ROC'].str[:-1].astype(float).values / 100
+        close_ret = ((sell_price - contract_ask) * qty * 100) / tuc
+        opened = pd.to_datetime(portfolio_df['Date Opened (F)'], format='%m/%d/%Y')
+        dse = (pd.Timestamp(today) - opened).dt.days.values
+        immature_mask = (dse < min_close_days) | is_call
+        with np.errstate(all='ignore'):
+            cur_a_roc = (1 + close_ret) ** (365.2425 / np.where(immature_mask, 1, dse)) - 1
+        cur_a_roc = np.where(immature_mask, 0.0, cur_a_roc)
+
+        # update general stats
+        portfolio_pl = pl[is_put].sum()
+        max_portfolio_pl = (sell_price * 100 * qty).sum()
+        cash_util = tuc.sum()
 
         # build dataframe
-        df = pd.DataFrame(np.transpose(contract_data))
-        df.index = portfolio_df['Contract (F)'].values
-        df.columns = [
-            'underlying ($)', 'cont_price ($)', 'dte (D)', 
-            'be ($)', 'moneyness (%)', 'status', 'return (%)', 
-            'p/l ($)', 'target_ask ($)', 'a_roc (%)', 
-            'cur_a_roc (%)'
-        ]
+        df = pd.DataFrame({
+            'underlying ($)': np.round(underlying_quote, 2),
+            'cont_price ($)': np.round(contract_last, 2),
+            'dte (D)': dte,
+            'be ($)': strike - sell_price,
+            'moneyness (%)': np.round(moneyness * 100, 2),
+            'status': moneyness_status,
+            'return (%)': np.round(ret * 100, 2),
+            'p/l ($)': pl,
+            'target_ask ($)': contract_ask,
+            'a_roc (%)': np.round(a_roc * 100, 2),
+            'cur_a_roc (%)': np.round(cur_a_roc * 100, 2)
+        }, index=contract_strings)
 
         # rearrange columns
         df = df[[
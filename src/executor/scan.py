@@ -1,9 +1,12 @@
 from src.util.sheets import SheetsPortfolioExtractor
 from src.scanner.wheelput import WheelPutScanner
 from src.scanner.wheelcall import WheelCallScanner
+from src.util.records import put_chain_fields, put_quote_fields, contract_descriptions, RecordBuffer
+from src.util.selection import PutContractFilter, annualized_returns, prob_itm_rank
 from tabulate import tabulate
 import pandas as pd
 import numpy as np
+import time
 import os
 
 
@@ -16,6 +19,8 @@ class ScanExecutor:
                     print_results=True,
                     refresh_results=False,
                     return_results=False,
+                    on_update=None,
+                    update_secs=10.0,
                     **scan_kwargs):
 
         # fetch target equities
@@ -47,87 +52,118 @@ class ScanExecutor:
             price_cap=1000.0,
             save_scan=False,
             log_changes=False,
+            **self.put_selection_kwargs(aroc_limit, prob_itm_limit),
             **scan_kwargs
         )
 
+        # stream winners into running leaderboard
+        leaderboard = RecordBuffer()
+        contract_filter = PutContractFilter(aroc_limit, prob_itm_limit)
+        last_update = None
+        for key, records in scanner.run_iter():
+            if len(records) == 0: continue
+            leaderboard.append(records)
+            if on_update is None: continue
+
+            # skip batches without new standings
+            if not contract_filter(records).any(): continue
+            if last_update is not None and time.time() - last_update < update_secs: continue
+
+            # publish throttled mid-scan standings
+            df_top = self.compile_put_scan(leaderboard.to_records(), scanner.symbols,
+                target_equities, forecast_df, aroc_limit, prob_itm_limit)
+            if df_top is not None: on_update(df_top)
+            last_update = time.time()
+
         # get results
-        data = np.array(sum(scanner.run()['results'].values(), []))
-        if data.shape[0] == 0:
+        df_top = self.compile_put_scan(
+            records=leaderboard.to_records(),
+            symbols=scanner.symbols,
+            target_equities=target_equities,
+            forecast_df=forecast_df,
+            aroc_limit=aroc_limit,
+            prob_itm_limit=prob_itm_limit
+        )
+        if df_top is None:
             print('No matching puts.')
             return
-        df = pd.DataFrame(data[:, 1:]).astype(np.float64)
-        df.index = data[:, 0]
-        df.columns = [
-            'underlying', 'premium', 'dte', 'roc', 'be', 'moneyness',
-            'prob_itm_delta', 'prob_be_delta', 'prob_be_iv', 'iv', 'iv_skew',
-            'udl_year_ret', 'udl_year_ret_r2', 'udl_year_market_corr', 'udl_hist_vol', 
-            'udl_iv_percentile', 'udl_hv_percentile', 'above_be_percentile', 'exp_move_conf'
-        ]
+
+        # output results
+        if print_results:
+            formatted_df_top = tabulate(df_top.drop(columns='symbol'), headers='keys', tablefmt='psql')
+            if refresh_results: os.system('clear')
+            print()
+            print('Contract Scan')
+            print(formatted_df_top, flush=True)
+
+        # return results
+        if return_results:
+            return df_top
+
+    def put_selection_kwargs(self, aroc_limit, prob_itm_limit):
+
+        # keep each equity's lowest prob_itm passing contract
+        return {
+            'contract_filter': PutContractFilter(aroc_limit, prob_itm_limit),
+            'rank_key': prob_itm_rank,
+            'top_k': 1
+        }
+
+    def compile_put_scan(self, records, symbols, target_equities, forecast_df, aroc_limit, prob_itm_limit):
 
         # filter all contracts
-        df['prob_itm_delta'] = np.abs(df['prob_itm_delta'])
-        df['a_roc'] = (1.0 + df['roc']) ** (365.2425 / df['dte']) - 1.0
-        df = df[df['a_roc'] >= aroc_limit]
-        df = df[df['prob_itm_delta'] < prob_itm_limit]
+        prob_itm = prob_itm_rank(records)
+        a_roc = annualized_returns(records)
+        mask = (a_roc >= aroc_limit) & (prob_itm < prob_itm_limit)
+        records, prob_itm, a_roc = records[mask], prob_itm[mask], a_roc[mask]
+        if records.shape[0] == 0: return None
 
         thresh = prob_itm_limit + aroc_limit
         min_score = aroc_limit * (thresh - prob_itm_limit)
         max_score = 0.5 * (thresh - 0.1)
-        norm = lambda x: (x - x.min()) / (x.max() - x.min())
 
-        # refine columns
-        df_filt = pd.DataFrame().astype(np.float64)
-        df_filt['underlying ($)'] = round(df['underlying'], 2)
-        df_filt['target_ask ($)'] = round(df['premium'] / 100.0, 2)
-        df_filt['score (%)'] = round(100 * (df['a_roc'] * (thresh - df['prob_itm_delta']) - min_score) / (max_score - min_score), 3)
-        df_filt['dte (D)'] = df['dte']
-        df_filt['moneyness (%)'] = round(df['moneyness'], 3)
-        df_filt['a_roc (%)'] = round(df['a_roc'], 3)
-        df_filt['prob_itm (%)'] = round(df['prob_itm_delta'] * 100, 3)
-        df_filt.index = df.index
+        # lowest prob_itm contract per symbol
+        prob_itm_pct = np.round(prob_itm * 100, 3)
+        order = np.lexsort((prob_itm_pct, records['symbol_id']))
+        symbol_ids, first = np.unique(records['symbol_id'][order], return_index=True)
+        winners = dict(zip(symbol_ids.tolist(), order[first].tolist()))
+
+        # order winners by target equity
+        symbol_index = {s: i for i, s in enumerate(symbols)}
+        rows = [winners[symbol_index[e]] for e in target_equities if symbol_index.get(e) in winners]
+        if len(rows) == 0: return None
+        top, a_roc, prob_itm_pct = records[rows], a_roc[rows], prob_itm_pct[rows]
+        tickers = [symbols[i] for i in top['symbol_id'].tolist()]
 
         # get expected relative move
-        contract_tgt = df['moneyness'] * df['underlying']
-        exp_move_tgt = df['underlying'] - df['exp_move_conf'] * df['underlying']
+        underlying = top['underlying']
+        contract_tgt = top['moneyness'] * underlying
+        exp_move_tgt = underlying - top['exp_move_conf'] * underlying
         exp_rel_move = (exp_move_tgt - contract_tgt) / contract_tgt
-        df_filt['exp_move (%)'] = round(exp_rel_move * 100, 3)
-
-        # filter top contracts
-        top_indices, top_results = [], []
-        for equity in target_equities:
-            df_result = df_filt[df_filt.index.str.startswith(equity + ' ')]
-            df_result = df_result.nsmallest(1, 'prob_itm (%)')
-            if df_result.shape[0] == 1: 
-                result = np.squeeze(df_result)
-                top_indices.append(result.name)
-                top_results.append(result)
-        top_results = pd.DataFrame(top_results)
-        top_results.columns = df_filt.columns
-        top_results.index = top_indices
 
         # incorporate analyst metrics
-        strikes = np.array([float(idx.split(' ')[4][1:]) for idx in top_indices]).reshape((-1, 1))
-        tickers = [str(idx.split(' ')[0]) for idx in top_indices]
-        forecast_df = forecast_df.loc[tickers]
-        forecast_df -= np.broadcast_to(strikes, (strikes.shape[0], 3))
-        forecast_df /= np.broadcast_to(strikes, (strikes.shape[0], 3))
-        top_results['hi_fc (%)'] = np.round(100 * forecast_df.iloc[:, 0].values, 3)
-        top_results['mdn_fc (%)'] = np.round(100 * forecast_df.iloc[:, 1].values, 3)
-        top_results['lo_fc (%)'] = np.round(100 * forecast_df.iloc[:, 2].values, 3)
+        strikes = top['strike'].reshape((-1, 1))
+        forecasts = (forecast_df.loc[tickers].values - strikes) / strikes
+
+        # build top contracts
+        top_results = pd.DataFrame({
+            'symbol': tickers,
+            'underlying ($)': np.round(underlying, 2),
+            'target_ask ($)': np.round(top['premium'] / 100.0, 2),
+            'score (%)': np.round(100 * (a_roc * (thresh - np.abs(top['prob_itm_delta'])) - min_score) / (max_score - min_score), 3),
+            'dte (D)': top['dte'],
+            'moneyness (%)': np.round(top['moneyness'], 3),
+            'a_roc (%)': np.round(a_roc, 3),
+            'prob_itm (%)': prob_itm_pct,
+            'exp_move (%)': np.round(exp_rel_move * 100, 3),
+            'hi_fc (%)': np.round(100 * forecasts[:, 0], 3),
+            'mdn_fc (%)': np.round(100 * forecasts[:, 1], 3),
+            'lo_fc (%)': np.round(100 * forecasts[:, 2], 3)
+        }, index=contract_descriptions(top, symbols))
         top_results = top_results.replace(np.nan, "N/A", regex=True)
         df_top = top_results.sort_values('prob_itm (%)', ascending=True)
 
-        # output results
-        if print_results:
-            formatted_df_top = tabulate(df_top, headers='keys', tablefmt='psql')
-            if refresh_results: os.system('clear')
-            print()
-            print('Contract Scan')
-            print(formatted_df_top, flush=True)
-
-        # return results
-        if return_results:
-            return df_top
+        return df_top
 
     def run_focus_put_scanner(self, symbol):
 
@@ -141,18 +177,13 @@ class ScanExecutor:
         )
 
         # get results
-        data = np.array(sum(scanner.run()['results'].values(), []))
-        if data.shape[0] == 0:
+        scan = scanner.run()
+        records = scan['results']
+        if records.shape[0] == 0:
             print('No matching puts.')
             return
-        df = pd.DataFrame(data[:, 1:]).astype(np.float64)
-        df.index = data[:, 0]
-        df.columns = [
-            'underlying', 'premium', 'dte', 'roc', 'be', 'moneyness', 
-            'prob_itm_delta', 'prob_be_delta', 'prob_be_iv', 'iv', 'iv_skew',
-            'udl_year_ret', 'udl_year_ret_r2', 'udl_year_market_corr', 'udl_hist_vol', 
-            'udl_iv_percentile', 'udl_hv_percentile', 'above_be_percentile'
-        ]
+        df = pd.DataFrame({f: records[f] for f in put_chain_fields + put_quote_fields})
+        df.index = contract_descriptions(records, scan['symbols'])
 
         # filter all contracts
         df['a_roc'] = (1.0 + df['roc']) ** (365.2425 / df['dte']) - 1.0
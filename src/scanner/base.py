@@ -5,4 +5,8 @@ class ScannerBase:
 
     @abstractmethod
     def run(self):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    @abstractmethod
+    def run_iter(self):
+        raise NotImplementedError
@@ -1,28 +1,12 @@
-from py_vollib.black_scholes_merton.implied_volatility import implied_volatility
-from py_vollib.black_scholes_merton.greeks import analytical
-import numpy.polynomial.polynomial as poly
-from src.scanner.base import ScannerBase
-from src.util.atomic import AtomicBool
-from src.api.tradier import TradierAPI
-from src.api.yfinance import YFinanceAPI
-from src.api.atomicfinance import AtomicYFinanceAPI
-from src.api.ycharts import YChartsAPI
+from src.scanner.pipeline import PipelineScanner, ScannerPipeline, UniverseSource, StrategyKernel, RowSink
+from src.util.chain import ChainColumns
+from src.util.curve import DeltaCurve
+from src.util.spread import SpreadProfitGrid
 from datetime import datetime, date
-from itertools import permutations
-from queue import Queue, Empty
-from numpy import warnings
-from pathlib import Path
-import multiprocessing
-from tqdm import tqdm
 import numpy as np
-import threading
-import math
-import time
-import csv
-import os
 
 
-class CreditPutSpreadScanner(ScannerBase):
+class CreditPutSpreadScanner(PipelineScanner):
 
     def __init__(self, 
         uni_list=None, 
@@ -31,174 +15,42 @@ class CreditPutSpreadScanner(ScannerBase):
         save_scan=True,
         log_changes=True,
         manual_greeks=False,
-        scan_name=None
+        scan_name=None,
+        prog_bar=True,
+        async_fetch=False,
+        max_concurrency=50,
+        use_cache=False,
+        cache_ttl=300.0,
+        stale_while_revalidate=False
     ):
 
-        self.uni_list = uni_list
-        self.uni_file = uni_file
-        self.num_processes = num_processes
-        self.save_scan = save_scan
-        self.log_changes = log_changes
-        self.manual_greeks = manual_greeks
-        self.scan_name = scan_name
-
-        # fetch universe
-        if self.uni_file is not None:
-            f = open(self.uni_file, 'r')
-            uni_list = list(csv.reader(f))
-            self.uni = [row[0] for row in uni_list]        
-            f.close()
-        elif self.uni_list is not None:
-            self.uni = self.uni_list
-        else:
-            raise Exception('No universe specified.')
-
-        # build scan name
-        if self.scan_name is None:
-            k = 'cps'
-            d = str(datetime.today()).split(' ')[0]
-            t = str(datetime.today()).split(' ')[-1].split('.')[0]
-            self.scan_name = '{}_{}_{}'.format(k, d, t)
-
-    def run(self):
-
-        # build resources
-        option_api = TradierAPI()
-        stock_api = YFinanceAPI()
-        dividend_api = AtomicYFinanceAPI()
-        risk_free_rate_api = YChartsAPI()
-        manager = multiprocessing.Manager()
-        symbol_queue = manager.Queue()
-        api_rate_cv = manager.Condition()
-        api_rate_avail = manager.Value('i', 200)
-        result_map = manager.dict()
-        director_exit_flag = AtomicBool(value=False)
-
-        # build meta resources
-        fetch_failure_counter = manager.Value('i', 0)
-        analysis_failure_counter = manager.Value('i', 0)
-        log_queue = manager.Queue()
-
-        # fetch risk-free rate
-        risk_free_rate = risk_free_rate_api.fetch_risk_free_rate()
-
-        # load queue
-        for symbol in self.uni:
-            symbol_queue.put(symbol)
-
-        # run scanner threads
-        s_processes = []
-        for i in range(self.num_processes):
-            s_process = CreditPutSpreadScannerProcess(
-                process_num=i + 1, 
-                option_api=option_api, 
-                stock_api=stock_api,
-                dividend_api=dividend_api,
-                symbol_queue=symbol_queue, 
-                api_rate_cv=api_rate_cv,
-                api_rate_avail=api_rate_avail,
-                result_map=result_map,
-                fetch_failure_counter=fetch_failure_counter,
-                analysis_failure_counter=analysis_failure_counter,
-                log_queue=log_queue,
-                risk_free_rate=risk_free_rate,
-                manual_greeks=self.manual_greeks
-            )
-            s_process.start()
-            s_processes.append(s_process)
-
-        # run director thread
-        d_thread = CreditPutSpreadDirectorThread(
-            api_rate_cv=api_rate_cv,
-            api_rate_avail=api_rate_avail,
-            exit_flag=director_exit_flag,
-            log_queue=log_queue
+        # build scanner pipeline
+        self.pipeline = ScannerPipeline(
+            universe=UniverseSource(uni_list=uni_list, uni_file=uni_file),
+            kernel=CreditPutSpreadKernel(manual_greeks=manual_greeks),
+            sink=RowSink(),
+            num_processes=num_processes,
+            save_scan=save_scan,
+            log_changes=log_changes,
+            manual_greeks=manual_greeks,
+            scan_name=scan_name,
+            prog_bar=prog_bar,
+            async_fetch=async_fetch,
+            max_concurrency=max_concurrency,
+            use_cache=use_cache,
+            cache_ttl=cache_ttl,
+            stale_while_revalidate=stale_while_revalidate
         )
-        d_thread.start()
-
-        # run progress bar
-        self.__run_progress_bar(symbol_queue, log_queue, s_processes, 
-            d_thread, director_exit_flag)
-
-        # save results
-        if self.save_scan:
-            self.__save_scan(result_map._getvalue())
 
-        return {
-            'results': result_map._getvalue(),
-            'fetch_failure_count': fetch_failure_counter.value,
-            'analysis_failure_count': analysis_failure_counter.value
-        }
 
-    def __run_progress_bar(self, symbol_queue, log_queue, s_processes, 
-        d_thread, director_exit_flag):
+class CreditPutSpreadKernel(StrategyKernel):
 
-        size = symbol_queue.qsize()
-        pbar = tqdm(total=size)
+    name = 'cps'
+    dte_window = (21, 91)
 
-        # build log file
-        if self.log_changes:
-            Path('log').mkdir(exist_ok=True)
-            f = open('log/{}.log'.format(self.scan_name), 'w+')
-
-        # update prog bar
-        while not symbol_queue.empty():
-            if self.log_changes: self.__flush_logs(f, log_queue)
-            new_size = symbol_queue.qsize()
-            pbar.update(size - new_size)
-            size = new_size
-            time.sleep(0.1)
-        new_size = symbol_queue.qsize()
-        pbar.update(size - new_size)
-
-        # wait for queue
-        symbol_queue.join()
-        pbar.close()
-
-        # wait for threads
-        for p in s_processes: p.join()
-        director_exit_flag.update(True)
-        d_thread.join()
-
-        # flush logs
-        if self.log_changes:
-            self.__flush_logs(f, log_queue)
-            f.close()
-
-    def __save_scan(self, scan):
-        vals = sum(scan.values(), [])
-
-        # save file
-        Path('scan').mkdir(exist_ok=True)
-        f = open('scan/{}.csv'.format(self.scan_name), 'w+')
-        csv.writer(f, delimiter=',').writerows(vals)
-        f.close()
-
-    def __flush_logs(self, f, log_queue):
-        while not log_queue.empty():
-            f.write(log_queue.get() + '\n')
-        f.flush()
-        os.fsync(f)
-
-
-class CreditPutSpreadScannerProcess(multiprocessing.Process):
-
-    def __init__(self, 
-        process_num, 
-        option_api,
-        stock_api,
-        dividend_api,
-        symbol_queue, 
-        api_rate_cv,
-        api_rate_avail,
-        result_map,
-        fetch_failure_counter,
-        analysis_failure_counter,
-        log_queue,
-        risk_free_rate,
-        manual_greeks,
+    def __init__(self,
+        manual_greeks=False,
 
-        max_fetch_attempts=5,
         min_filtered_levels=5,
         option_price_floor=0.10,
         open_interest_floor=5,
@@ -206,173 +58,23 @@ class CreditPutSpreadScannerProcess(multiprocessing.Process):
         max_spread_width=20
     ):
 
-        multiprocessing.Process.__init__(self)
-        self.process_num = process_num
-        self.option_api = option_api
-        self.stock_api = stock_api
-        self.dividend_api = dividend_api
-        self.symbol_queue = symbol_queue
-        self.api_rate_cv = api_rate_cv
-        self.api_rate_avail = api_rate_avail
-        self.result_map = result_map
-        self.fetch_failure_counter = fetch_failure_counter
-        self.analysis_failure_counter = analysis_failure_counter
-        self.log_queue=log_queue
-        self.risk_free_rate = risk_free_rate
         self.manual_greeks = manual_greeks
 
-        self.max_fetch_attempts = max_fetch_attempts
         self.min_filtered_levels = min_filtered_levels
         self.option_price_floor = option_price_floor
         self.open_interest_floor = open_interest_floor
         self.volume_floor = volume_floor
         self.max_spread_width = max_spread_width
-        self.process_name = self.__class__.__name__ + str(self.process_num)
-
-    def run(self):
-        self.__log_message('INFO', 'starting scanner process')
-
-        # iteratively execute tasks
-        while True:
-            try: symbol = self.symbol_queue.get(block=False)
-            except Empty: break
-            self.__execute_task(symbol)
-            self.symbol_queue.task_done()
-
-        self.__log_message('INFO', 'shutting down scanner process')
-
-    def __execute_task(self, symbol):
-
-        # fetch underlying
-        if not self.__validate_symbol(symbol): return
-        underlying = self.__fetch_underlying(symbol)
-        if underlying is None:
-            self.__report_fetch_failure('underlying', (symbol,))
-            return
-
-        # fetch dividend
-        if self.manual_greeks: 
-            dividend = self.dividend_api.fetch_annual_yield(symbol)
-        else: dividend = 0.0
-        
-        # fetch expiration
-        expirations = self.__fetch_expirations(symbol)
-        if expirations is None:
-            self.__report_fetch_failure('expirations', (symbol,))
-            return
-
-        # iterate/validate expirations
-        for expiration in expirations:
-
-            # fetch chains
-            if not self.__validate_expiration(expiration): continue
-            chain = self.__fetch_chain(symbol, expiration)
-            if chain is None: 
-                self.__report_fetch_failure('chain', (symbol, expiration))
-                continue
-
-            # run analysis
-            try:
-                self.result_map[(symbol, expiration)] = self.__analyze_chain(
-                    symbol=symbol, 
-                    underlying=underlying, 
-                    dividend=dividend, 
-                    expiration=expiration, 
-                    chain=chain, 
-                    risk_free_rate=self.risk_free_rate
-                )
-            except Exception as e:
-                self.__report_analysis_failure((symbol, expiration), str(e))
-
-        return True
-
-    def __validate_symbol(self, symbol):
-
-        # ignore toronto exchange
-        if symbol.endswith('.TO'): return False
-        else: return True
-
-    def __validate_expiration(self, expiration):
-
-        # get dte
-        now_dt = date.today()
-        exp_dt = datetime.strptime(expiration, '%Y-%m-%d').date()
-        dte = (exp_dt - now_dt).days
-
-        # target dte range
-        if dte < 21 or dte > 91: return False
-        else: return True
-    
-    def __fetch_expirations(self, symbol):
-        expirations = None
-        attempts = 0
-
-        # retry api fetch
-        while expirations is None:
-            if attempts >= self.max_fetch_attempts: return None
-
-            # acquire api call
-            self.__wait_api_rate()
-            fetch_results = self.option_api.fetch_expirations(symbol)
-            attempts += 1
-
-            # validate fetch results
-            if fetch_results is not None:
-                expirations, available, _, _ = fetch_results
-                self.api_rate_avail.value = available
 
-        return expirations
-
-    def __fetch_chain(self, symbol, expiration):
-        chain = None
-        attempts = 0
-
-        # retry api fetch
-        while chain is None:
-            if attempts >= self.max_fetch_attempts: return None
-
-            # acquire api call
-            self.__wait_api_rate()
-            fetch_results = self.option_api.fetch_chain(symbol, expiration)
-            attempts += 1
-
-            # validate fetch results
-            if fetch_results is not None:
-                chain, available, _, _ = fetch_results
-                self.api_rate_avail.value = available
-
-        return chain
-
-    def __fetch_underlying(self, symbol):
-        underlying = None
-        attempts = 0
-
-        # retry api fetch
-        while underlying is None:
-            if attempts >= self.max_fetch_attempts: return None
-            underlying = self.stock_api.fetch_last_quote(symbol)
-            attempts += 1
-
-        return underlying
-
-    def __wait_api_rate(self):
-        with self.api_rate_cv:
-            self.api_rate_cv.wait()
-
-    def __report_fetch_failure(self, component, fetch_data):
-        self.fetch_failure_counter.value += 1
-        self.__log_message('ERROR', '{} fetch failed for {}'.format(component, fetch_data))
-
-    def __report_analysis_failure(self, analysis_data, error_msg):
-        self.analysis_failure_counter.value += 1
-        self.__log_message('ERROR', 'analysis failed for {} with error \"{}\"'.format(analysis_data, error_msg))
-
-    def __log_message(self, tag, msg):
-        log = str(datetime.today())
-        log += ' ' + tag
-        log += ' [' + self.process_name + ']'
-        log += ': ' + msg
-        self.log_queue.put(log)
+    def analyze_chain(self, symbol, expiration, chain, context):
+        return self.__analyze_chain(
+            symbol=symbol, 
+            underlying=context['underlying'], 
+            dividend=context['dividend'], 
+            expiration=expiration, 
+            chain=chain, 
+            risk_free_rate=self.risk_free_rate
+        )
 
     def __analyze_chain(self, 
         symbol, 
@@ -388,222 +90,71 @@ class CreditPutSpreadScannerProcess(multiprocessing.Process):
         exp_dt = datetime.strptime(expiration, '%Y-%m-%d').date()
         dte = (exp_dt - now_dt).days
 
-        # filter bad levels
-        filt_chain = []
-        for level in chain:
-            if self.__filter_level(symbol, underlying, level):
-                filt_chain.append(level)
-
-        # load greeks/iv
-        greeks_lookup = self.__load_greeks(underlying, dividend, filt_chain, dte, risk_free_rate)
-        if len(greeks_lookup) < self.min_filtered_levels: return []
-        coefs = self.__build_delta_curve(greeks_lookup)
- 
-        # iterate over spreads
-        spread_collection = []
-        for buy_level, sell_level in permutations(filt_chain, 2):
-            if buy_level['strike'] >= sell_level['strike']: continue
-
-            # calculate/filter p/l
-            width = sell_level['strike'] - buy_level['strike']
-            premium = sell_level['bid'] - buy_level['ask']
-            max_loss = premium - width
-            be = sell_level['strike'] - premium
-            risk_reward_ratio = abs(premium / max_loss)
-            if width > self.max_spread_width: continue
-            if premium <= 0.0: continue
-            if be <= buy_level['strike']: continue
-            if be >= sell_level['strike']: continue
-
-            # fetch greeks
-            buy_greeks = greeks_lookup[buy_level['strike']]
-            sell_greeks = greeks_lookup[sell_level['strike']]
-
-            # get probabilities
-            prob_max_loss = abs(buy_greeks['delta'])
-            prob_max_profit = 1 - abs(sell_greeks['delta'])
-
-            # calculated/filter expected profits
-            expected_spread_profit, total_spread_prob = self.__approximate_risk_adjusted_spread_profit(
-                width, premium, buy_level['strike'], sell_level['strike'], coefs, resolution=0.1)
-            expected_profit = prob_max_loss * max_loss
-            expected_profit += prob_max_profit * premium
-            expected_profit += expected_spread_profit
-            if expected_profit <= 0.0: continue
-            if abs(1.0 - (prob_max_loss + total_spread_prob + prob_max_profit)) >= 0.1: continue
-
-            # calulate net greeks
-            net_delta = buy_greeks['delta'] - sell_greeks['delta']
-            net_theta = buy_greeks['theta'] - sell_greeks['theta']
-            net_vega = buy_greeks['vega'] - sell_greeks['vega']
-            net_gamma = buy_greeks['gamma'] - sell_greeks['gamma']
-            
-            # add valid spreads
-            spread_collection.append([
-                '{} {} +{}/-{}'.format(symbol, expiration, buy_level['strike'], sell_level['strike']), # description
-                round(width, 2), # width
-                round(premium * 100, 2), # premium
-                round(max_loss * 100, 2), # max loss
-                round(be, 2), # break even
-                round(risk_reward_ratio, 2), # risk reward ratio
-                round(prob_max_loss, 2), # probability of max loss
-                round(prob_max_profit, 2), # probability of max profit
-                round(expected_profit * 100, 2), # risk-adjusted profit
-                round(net_delta, 2), # position delta
-                round(net_theta, 2), # position theta
-                round(net_vega, 2), # position vega
-                round(net_gamma, 2) # position gamma
-            ])
+        # load columnar chain & greeks
+        cols = ChainColumns(chain)
+        greeks = cols.load_greeks(underlying, dividend, dte, risk_free_rate, self.manual_greeks)
+        otm = cols.otm_puts(symbol, underlying, self.option_price_floor, self.open_interest_floor, self.volume_floor)
+        idx = np.flatnonzero(otm & greeks['valid'])
+        if idx.shape[0] < self.min_filtered_levels: return []
+        strike, delta = cols.strike[idx], greeks['delta'][idx]
+
+        # fit monotone curve once per chain
+        curve = DeltaCurve(strike, delta)
+        grid = SpreadProfitGrid(strike, curve, resolution=0.1)
+
+        # calculate/filter p/l over strike matrix
+        width = strike[None, :] - strike[:, None]
+        premium = cols.bid[idx][None, :] - cols.ask[idx][:, None]
+        be = strike[None, :] - premium
+        pairs = (width > 0.0) & \
+            (width <= self.max_spread_width) & \
+            (premium > 0.0) & \
+            (be > strike[:, None]) & \
+            (be < strike[None, :])
+        buy, sell = np.nonzero(pairs)
+        width, premium, be = width[buy, sell], premium[buy, sell], be[buy, sell]
+        max_loss = premium - width
+        risk_reward_ratio = np.abs(premium / max_loss)
+
+        # get probabilities
+        prob_max_loss = np.abs(delta[buy])
+        prob_max_profit = 1 - np.abs(delta[sell])
+
+        # calculate/filter expected profits
+        expected_spread_profit, total_spread_prob = grid.expected_spread_profit(
+            strike[buy], strike[sell], premium)
+        expected_profit = prob_max_loss * max_loss
+        expected_profit += prob_max_profit * premium
+        expected_profit += expected_spread_profit
+        keep = (expected_profit > 0.0) & \
+            (np.abs(1.0 - (prob_max_loss + total_spread_prob + prob_max_profit)) < 0.1)
+        buy, sell = buy[keep], sell[keep]
+
+        # calulate net greeks
+        net = {}
+        for k in ['delta', 'theta', 'vega', 'gamma']:
+            net[k] = greeks[k][idx][buy] - greeks[k][idx][sell]
+
+        # save valid spreads
+        raw_strikes = [chain[i]['strike'] for i in idx.tolist()]
+        spread_collection = [list(c) for c in zip(
+            ['{} {} +{}/-{}'.format(symbol, expiration, raw_strikes[b], raw_strikes[s]) \
+                for b, s in zip(buy.tolist(), sell.tolist())], # description
+            self.__round_column(width[keep], 2), # width
+            self.__round_column(premium[keep] * 100, 2), # premium
+            self.__round_column(max_loss[keep] * 100, 2), # max loss
+            self.__round_column(be[keep], 2), # break even
+            self.__round_column(risk_reward_ratio[keep], 2), # risk reward ratio
+            self.__round_column(prob_max_loss[keep], 2), # probability of max loss
+            self.__round_column(prob_max_profit[keep], 2), # probability of max profit
+            self.__round_column(expected_profit[keep] * 100, 2), # risk-adjusted profit
+            self.__round_column(net['delta'], 2), # position delta
+            self.__round_column(net['theta'], 2), # position theta
+            self.__round_column(net['vega'], 2), # position vega
+            self.__round_column(net['gamma'], 2) # position gamma
+        )]
 
         return spread_collection
     
-    def __load_greeks(self, underlying, dividend, chain, dte, risk_free_rate):
-        greeks_lookup = {}
-
-        # load greeks for chain
-        for level in chain:
-            greeks = self.__calculate_greeks(underlying, dividend, level, dte, risk_free_rate)
-            greeks_lookup[level['strike']] = greeks
-
-        return greeks_lookup
-
-    def __calculate_greeks(self, underlying, dividend, level, dte, risk_free_rate):
-        if not self.manual_greeks:
-            return {
-                'iv': level['greeks']['mid_iv'],
-                'delta': level['greeks']['delta'],
-                'theta': level['greeks']['theta'],
-                'vega': level['greeks']['vega'],
-                'gamma': level['greeks']['gamma'],
-                'rho': level['greeks']['rho']
-            }
-
-        # get BS components
-        price = level['last']
-        S = underlying
-        K = level['strike']
-        t = dte / 365.0
-        r = risk_free_rate
-        q = dividend
-        flag = 'p'
-
-        # calculate IV
-        sigma = implied_volatility(price, S, K, t, r, q, flag)
-
-        # map greeks
-        return {
-            'iv': sigma,
-            'delta': analytical.delta(flag, S, K, t, r, sigma, q),
-            'theta': analytical.theta(flag, S, K, t, r, sigma, q),
-            'vega': analytical.vega(flag, S, K, t, r, sigma, q),
-            'gamma': analytical.gamma(flag, S, K, t, r, sigma, q),
-            'rho': analytical.rho(flag, S, K, t, r, sigma, q)
-        }
-
-    def __build_delta_curve(self, greeks_lookup):
-        fit_data = np.array([(k, v['delta']) for k, v in greeks_lookup.items()])
-
-        # fit with dynamic order
-        order, coefs = 11, None
-        with warnings.catch_warnings():
-            warnings.filterwarnings('error')
-            while coefs is None:
-                try: coefs = poly.polyfit(fit_data[:, 0], np.abs(fit_data[:, 1]), order)
-                except np.polynomial.polyutils.RankWarning: order -= 1
-        return coefs
-
-    def __approximate_risk_adjusted_spread_profit(self, width, premium, buy_strike, 
-            sell_strike, coefs, resolution=0.1):
-
-        total_spread_prob = 0
-        expected_profit = 0
-        for i in range(int(width / resolution)):
-
-            # resolve price interval
-            lo = round(buy_strike + resolution * i, 2)
-            hi = round(lo + resolution, 2)
-            future_price = round((lo + hi) / 2, 2)
-            
-            # approximate interval probability
-            lo_delta = self.__interpolate_delta(lo, coefs)
-            hi_delta = self.__interpolate_delta(hi, coefs)
-            interval_prob = hi_delta - lo_delta
-            if interval_prob < 0: interval_prob = 0
-            
-            # calculate expected interval return
-            interval_return = (future_price - sell_strike) + premium
-            expected_profit += interval_prob * interval_return
-            total_spread_prob += interval_prob
-        
-        return expected_profit, total_spread_prob
-
-    def __interpolate_delta(self, price, coefs):
-        return poly.polyval(price, coefs)
-
-    def __filter_level(self, symbol, underlying, level):
-        if level['option_type'] != 'put': return False # ignore put options
-        if underlying <= level['strike']: return False # ignore ATM/ITM options
-        if level['root_symbol'] != symbol: return False # ignore adjusted options
-        if level['last'] is None or level['last'] <= self.option_price_floor: return False # ignore low last price
-        if level['bid'] is None or level['bid'] <= self.option_price_floor: return False # ignore low bid price
-        if level['ask'] is None or level['ask'] <= self.option_price_floor: return False # ignore low ask price
-        if level['open_interest'] <= self.open_interest_floor: return False # ignore low open interest
-        if level['volume'] <= self.volume_floor: return False # ignore low volume
-        return True
-
-
-class CreditPutSpreadDirectorThread(threading.Thread):
-
-    def __init__(self,
-        api_rate_cv,
-        api_rate_avail,
-        exit_flag,
-        log_queue
-    ):
-
-        threading.Thread.__init__(self)
-        self.api_rate_cv = api_rate_cv
-        self.api_rate_avail = api_rate_avail
-        self.exit_flag = exit_flag
-        self.log_queue = log_queue
-
-        self.thread_name = self.__class__.__name__
-
-    def run(self):
-        self.__log_message('INFO', 'starting director thread')
-        last_rate = 0
-
-        while True:
-
-            # check exit condition
-            if self.exit_flag.get(): break
-            
-            # throttle api
-            available_rate = self.api_rate_avail.value
-            if available_rate > 100: current_rate = 500
-            elif available_rate <= 30: current_rate = 30
-            else: current_rate = 2 * available_rate
-
-            # log rate change
-            if last_rate != current_rate:
-                tag = 'WARNING' if current_rate <= 100 else 'INFO'
-                msg = 'api rate changed from {} to {}'.format(last_rate, current_rate)
-                self.__log_message(tag, msg)
-                last_rate = current_rate
-
-            # notify processes
-            time.sleep(60 / current_rate)
-            self.__notify_api_rate()
-
-        self.__log_message('INFO', 'shutting down director thread')
-
-    def __notify_api_rate(self):
-        with self.api_rate_cv:
-            self.api_rate_cv.notify(n=1)
-
-    def __log_message(self, tag, msg):
-        log = str(datetime.today())
-        log += ' ' + tag
-        log += ' [' + self.thread_name + ']'
-        log += ': ' + msg
-        self.log_queue.put(log)
\ No newline at end of file
+    def __round_column(self, values, digits):
+        return [round(v, digits) for v in values.tolist()]
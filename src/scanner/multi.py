@@ -0,0 +1,61 @@
+from src.scanner.pipeline import PipelineScanner, ScannerPipeline, UniverseSource, MultiStrategyKernel, \
+    StrategySinks, RecordSink, RowSink
+from src.scanner.wheelput import WheelPutKernel
+from src.scanner.cps import CreditPutSpreadKernel
+from src.scanner.gamma import GammaKernel
+
+
+class MultiStrategyScanner(PipelineScanner):
+
+    def __init__(self,
+        uni_list=None,
+        uni_file=None,
+        strategies=('wheelput', 'cps', 'gamma'),
+        price_cap=None,
+        num_processes=6,
+        save_scan=True,
+        log_changes=True,
+        manual_greeks=False,
+        scan_name=None,
+        prog_bar=True,
+        async_fetch=False,
+        max_concurrency=50,
+        use_cache=False,
+        cache_ttl=300.0,
+        stale_while_revalidate=False
+    ):
+
+        # build strategy kernels & sinks
+        universe = UniverseSource(uni_list=uni_list, uni_file=uni_file)
+        kernels, sinks = [], {}
+        for strategy in strategies:
+            if strategy == 'wheelput':
+                kernel = WheelPutKernel(price_cap=price_cap, manual_greeks=manual_greeks)
+                sink = RecordSink(capacity=32 * len(universe.symbols))
+            elif strategy == 'cps':
+                kernel = CreditPutSpreadKernel(manual_greeks=manual_greeks)
+                sink = RowSink()
+            elif strategy == 'gamma':
+                kernel = GammaKernel(manual_greeks=manual_greeks)
+                sink = RowSink()
+            else: raise Exception('Unknown strategy \"{}\".'.format(strategy))
+            kernels.append(kernel)
+            sinks[kernel.name] = sink
+
+        # build scanner pipeline
+        self.pipeline = ScannerPipeline(
+            universe=universe,
+            kernel=MultiStrategyKernel(kernels),
+            sink=StrategySinks(sinks),
+            num_processes=num_processes,
+            save_scan=save_scan,
+            log_changes=log_changes,
+            manual_greeks=manual_greeks,
+            scan_name=scan_name,
+            prog_bar=prog_bar,
+            async_fetch=async_fetch,
+            max_concurrency=max_concurrency,
+            use_cache=use_cache,
+            cache_ttl=cache_ttl,
+            stale_while_revalidate=stale_while_revalidate
+        )
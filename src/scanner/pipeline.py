@@ -0,0 +1,957 @@
+from src.scanner.base import ScannerBase
+from src.api.atomicfinance import AtomicYFinanceAPI
+from src.util.ratelimit import TokenBucketRateLimiter
+from src.util.records import put_chain_fields, put_quote_fields, contract_descriptions, RecordBuffer
+from src.util.selection import merge_ranked_records
+from src.util.analytics import UniverseAnalytics
+from src.util.shared import SharedCounter, SymbolQueue, drain_queue
+from src.api.chaincache import ChainCache
+from src.api.tradier import TradierAPI, AsyncTradierAPI
+from src.api.yfinance import YFinanceAPI
+from src.api.ycharts import YChartsAPI
+from datetime import datetime, date
+from abc import abstractmethod
+from queue import Empty, Full
+from pathlib import Path
+import multiprocessing
+from tqdm import tqdm
+import numpy as np
+import itertools
+import threading
+import asyncio
+import csv
+import sys
+import os
+
+
+class UniverseSource:
+
+    def __init__(self, uni_list=None, uni_file=None):
+        self.uni_list = uni_list
+        self.uni_file = uni_file
+
+        # fetch universe
+        if self.uni_file is not None:
+            f = open(self.uni_file, 'r')
+            uni_list = list(csv.reader(f))
+            self.symbols = [row[0] for row in uni_list]
+            f.close()
+        elif self.uni_list is not None:
+            self.symbols = self.uni_list
+        else:
+            raise Exception('No universe specified.')
+
+
+def build_analytics(history):
+
+    # require full index calendar
+    if not history.validate(history.index): raise Exception('Failed to fetch index data.')
+    return UniverseAnalytics(history)
+
+
+class StrategyKernel:
+
+    name = None
+    dte_window = None
+    needs_underlying = True
+    needs_quotes = False
+    needs_analytics = False
+
+    def prepare(self, history, risk_free_rate, analytics=None):
+        self.history = history
+        self.risk_free_rate = risk_free_rate
+
+        # precompute universe analytics unless shared
+        self.analytics, self.owns_analytics = analytics, False
+        if self.needs_analytics and analytics is None:
+            self.analytics, self.owns_analytics = build_analytics(history), True
+
+    def release(self):
+
+        # release owned shared memory
+        if self.owns_analytics: self.analytics.unlink()
+
+    def setup(self):
+        pass
+
+    def validate_symbol(self, symbol):
+
+        # ignore toronto exchange
+        if symbol.endswith('.TO'): return False
+        else: return True
+
+    def validate_underlying(self, underlying):
+        return True
+
+    def validate_quotes(self, quotes):
+        return not np.isnan(quotes).any()
+
+    def validate_expiration(self, expiration):
+
+        # get dte
+        now_dt = date.today()
+        exp_dt = datetime.strptime(expiration, '%Y-%m-%d').date()
+        dte = (exp_dt - now_dt).days
+
+        # target dte range
+        if dte < self.dte_window[0] or dte > self.dte_window[1]: return False
+        else: return True
+
+    def batches_symbols(self):
+        return False
+
+    def finish_symbol(self, symbol_results):
+        return symbol_results
+
+    def route(self, symbol, context):
+        return [self]
+
+    def result_key(self, kernel, key):
+        return key
+
+    @abstractmethod
+    def analyze_chain(self, symbol, expiration, chain, context):
+        raise NotImplementedError
+
+    @abstractmethod
+    def analyze_symbol(self, symbol, context):
+        raise NotImplementedError
+
+
+class MultiStrategyKernel(StrategyKernel):
+
+    name = 'multi'
+
+    def __init__(self, kernels):
+        self.kernels = kernels
+
+        # validate chain strategies
+        if len(self.kernels) == 0: raise Exception('No strategies specified.')
+        if any(k.dte_window is None for k in self.kernels):
+            raise Exception('Strategies must analyze option chains.')
+
+        # fetch union of strategy inputs
+        self.dte_window = (
+            min(k.dte_window[0] for k in self.kernels),
+            max(k.dte_window[1] for k in self.kernels)
+        )
+        self.needs_underlying = any(k.needs_underlying for k in self.kernels)
+        self.needs_quotes = any(k.needs_quotes for k in self.kernels)
+        self.needs_analytics = any(k.needs_analytics for k in self.kernels)
+
+    def prepare(self, history, risk_free_rate, analytics=None):
+        StrategyKernel.prepare(self, history, risk_free_rate, analytics)
+
+        # share universe analytics across strategies
+        for kernel in self.kernels: kernel.prepare(history, risk_free_rate, self.analytics)
+
+    def release(self):
+        for kernel in self.kernels: kernel.release()
+        StrategyKernel.release(self)
+
+    def setup(self):
+        for kernel in self.kernels: kernel.setup()
+
+    def validate_symbol(self, symbol):
+        return any(k.validate_symbol(symbol) for k in self.kernels)
+
+    def validate_underlying(self, underlying):
+        return any(k.validate_underlying(underlying) for k in self.kernels)
+
+    def validate_quotes(self, quotes):
+        return any(not k.needs_quotes or k.validate_quotes(quotes) for k in self.kernels)
+
+    def validate_expiration(self, expiration):
+        return any(k.validate_expiration(expiration) for k in self.kernels)
+
+    def route(self, symbol, context):
+        kernels = []
+
+        # keep strategies accepting symbol inputs
+        for kernel in self.kernels:
+            if not kernel.validate_symbol(symbol): continue
+            if kernel.needs_underlying and not kernel.validate_underlying(context['underlying']): continue
+            if kernel.needs_quotes and not kernel.validate_quotes(context['quotes']): continue
+            kernels.append(kernel)
+
+        return kernels
+
+    def result_key(self, kernel, key):
+        return (kernel.name, key)
+
+
+class ResultSink:
+
+    def tables(self, scan, scan_name):
+        return [(scan_name, self.rows(scan))]
+
+
+class RecordSink(ResultSink):
+
+    def __init__(self, capacity=1024, rank_key=None):
+        self.capacity = capacity
+        self.rank_key = rank_key
+
+    def open(self):
+        self.buffer = RecordBuffer(capacity=self.capacity)
+
+    def add(self, key, records):
+        self.buffer.append(records)
+
+    def summary(self, history):
+
+        # merge per-symbol winners
+        if self.rank_key is not None: records = merge_ranked_records(self.buffer.blocks(), self.rank_key)
+        else: records = self.buffer.to_records()
+
+        return {
+            'results': records,
+            'symbols': history.symbols
+        }
+
+    def rows(self, scan):
+        records, symbols = scan['results'], scan['symbols']
+        columns = [records[f].tolist() for f in put_chain_fields + put_quote_fields]
+        return [list(r) for r in zip(contract_descriptions(records, symbols), *columns)]
+
+
+class RowSink(ResultSink):
+
+    def __init__(self, keyed_rows=False):
+        self.keyed_rows = keyed_rows
+
+    def open(self):
+        self.results = {}
+
+    def add(self, key, result):
+        self.results[key] = result
+
+    def summary(self, history):
+        return {
+            'results': self.results
+        }
+
+    def rows(self, scan):
+        if self.keyed_rows: return [[k, *v] for k, v in scan['results'].items()]
+        return itertools.chain.from_iterable(scan['results'].values())
+
+
+class StrategySinks:
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+
+    def open(self):
+        for sink in self.sinks.values(): sink.open()
+
+    def add(self, key, result):
+
+        # route result to strategy sink
+        name, key = key
+        self.sinks[name].add(key, result)
+
+    def summary(self, history):
+        return {name: sink.summary(history) for name, sink in self.sinks.items()}
+
+    def tables(self, scan, scan_name):
+        tables = []
+        for name, sink in self.sinks.items():
+            tables += sink.tables(scan[name], '{}_{}'.format(scan_name, name))
+        return tables
+
+
+class ScannerPipeline:
+
+    def __init__(self,
+        universe,
+        kernel,
+        sink,
+        num_processes=6,
+        save_scan=True,
+        log_changes=True,
+        manual_greeks=False,
+        scan_name=None,
+        prog_bar=True,
+        async_fetch=False,
+        max_concurrency=50,
+        use_cache=False,
+        cache_ttl=300.0,
+        stale_while_revalidate=False
+    ):
+
+        self.universe = universe
+        self.kernel = kernel
+        self.sink = sink
+        self.num_processes = num_processes
+        self.save_scan = save_scan
+        self.log_changes = log_changes
+        self.manual_greeks = manual_greeks
+        self.scan_name = scan_name
+        self.prog_bar = prog_bar
+        self.async_fetch = async_fetch
+        self.max_concurrency = max_concurrency
+        self.use_cache = use_cache
+        self.cache_ttl = cache_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+
+        # build scan name
+        if self.scan_name is None:
+            k = self.kernel.name
+            d = str(datetime.today()).split(' ')[0]
+            t = str(datetime.today()).split(' ')[-1].split('.')[0]
+            self.scan_name = '{}_{}_{}'.format(k, d, t)
+
+    def run(self):
+
+        # collect streamed results
+        self.sink.open()
+        for key, result in self.run_iter(): self.sink.add(key, result)
+        scan = self.sink.summary(self.history)
+
+        # save results
+        if self.save_scan:
+            self.__save_scan(scan)
+
+        scan['fetch_failure_count'] = self.fetch_failure_count
+        scan['analysis_failure_count'] = self.analysis_failure_count
+        return scan
+
+    def run_iter(self):
+        fetch_chains = self.kernel.dte_window is not None
+
+        # build resources
+        stock_api = YFinanceAPI()
+        symbol_queue = SymbolQueue(self.universe.symbols)
+        result_queue = multiprocessing.Queue()
+
+        # build meta resources
+        fetch_failure_counter = SharedCounter()
+        analysis_failure_counter = SharedCounter()
+        log_queue = multiprocessing.Queue()
+
+        # build fetch stage
+        fetcher, dividend_api = None, None
+        if fetch_chains:
+            fetcher = OptionChainFetcher(
+                option_api=TradierAPI(),
+                api_limiter=TokenBucketRateLimiter(),
+                chain_cache=self.__build_chain_cache(),
+                greeks=not self.manual_greeks
+            )
+            dividend_api = AtomicYFinanceAPI()
+
+        # fetch risk-free rate
+        if self.manual_greeks:
+            risk_free_rate = YChartsAPI().fetch_risk_free_rate()
+        else: risk_free_rate = 0.0
+
+        # fetch universe history
+        history = stock_api.fetch_universe_closes(self.universe.symbols)
+        if history is None: raise Exception('Failed to fetch universe history.')
+        self.history = history
+
+        # prepare kernel resources
+        self.kernel.prepare(history, risk_free_rate)
+
+        # build prefetched chain queue
+        if self.async_fetch and fetch_chains: chain_queue = multiprocessing.Queue(maxsize=4 * self.num_processes)
+        else: chain_queue = None
+
+        # run scanner processes
+        s_processes = []
+        for i in range(self.num_processes):
+            s_process = PipelineWorkerProcess(
+                process_num=i + 1,
+                kernel=self.kernel,
+                history=history,
+                fetcher=fetcher,
+                dividend_api=dividend_api,
+                symbol_queue=symbol_queue,
+                chain_queue=chain_queue,
+                result_queue=result_queue,
+                fetch_failure_counter=fetch_failure_counter,
+                analysis_failure_counter=analysis_failure_counter,
+                log_queue=log_queue,
+                manual_greeks=self.manual_greeks
+            )
+            s_process.start()
+            s_processes.append(s_process)
+
+        # run fetch thread
+        s_threads = []
+        if chain_queue is not None:
+            f_thread = AsyncChainFetchThread(
+                option_api=AsyncTradierAPI(),
+                api_limiter=fetcher.api_limiter,
+                chain_cache=fetcher.chain_cache,
+                kernel=self.kernel,
+                history=history,
+                symbol_queue=symbol_queue,
+                chain_queue=chain_queue,
+                fetch_failure_counter=fetch_failure_counter,
+                log_queue=log_queue,
+                num_consumers=self.num_processes,
+                greeks=not self.manual_greeks,
+                max_concurrency=self.max_concurrency
+            )
+            f_thread.start()
+            s_threads.append(f_thread)
+
+        # stream results & progress
+        try: yield from self.__stream_results(symbol_queue, log_queue, result_queue, s_processes, s_threads)
+        finally:
+
+            # stop fetchers & workers on early exit
+            symbol_queue.close()
+            for t in s_threads: t.stop()
+            for p in s_processes:
+                if p.is_alive(): p.terminate()
+                p.join()
+            for t in s_threads: t.join()
+
+            # drop unconsumed prefetched chains
+            if chain_queue is not None: chain_queue.cancel_join_thread()
+
+            # release kernel resources
+            self.kernel.release()
+
+            self.fetch_failure_count = fetch_failure_counter.value
+            self.analysis_failure_count = analysis_failure_counter.value
+
+    def __build_chain_cache(self):
+        if not self.use_cache: return None
+        return ChainCache(
+            ttl=self.cache_ttl,
+            revalidate=self.stale_while_revalidate
+        )
+
+    def __stream_results(self, symbol_queue, log_queue, result_queue, s_processes, s_threads):
+
+        size = symbol_queue.qsize()
+        if self.prog_bar: pbar = tqdm(total=size)
+
+        # build log file
+        f = None
+        if self.log_changes:
+            Path('log').mkdir(exist_ok=True)
+            f = open('log/{}.log'.format(self.scan_name), 'w+')
+
+        try:
+
+            # yield results as workers publish them
+            while any(w.is_alive() for w in s_processes + s_threads):
+                self.__flush_logs(f, log_queue)
+                yield from self.__collect_results(result_queue, timeout=0.1)
+                new_size = symbol_queue.qsize()
+                if self.prog_bar: pbar.update(size - new_size)
+                size = new_size
+            new_size = symbol_queue.qsize()
+            if self.prog_bar: pbar.update(size - new_size)
+
+            # wait for processes/threads
+            for p in s_processes: p.join()
+            for t in s_threads: t.join()
+
+            # surface fetch thread errors
+            self.__flush_logs(f, log_queue)
+            for t in s_threads:
+                if t.error is not None: raise t.error
+
+            # final collection
+            yield from self.__collect_results(result_queue)
+
+        finally:
+            if self.prog_bar: pbar.close()
+            if f is not None: f.close()
+
+    def __collect_results(self, result_queue, timeout=None):
+        for batch in drain_queue(result_queue, timeout):
+            yield from batch.items()
+
+    def __save_scan(self, scan):
+        Path('scan').mkdir(exist_ok=True)
+
+        # save files
+        for scan_name, vals in self.sink.tables(scan, self.scan_name):
+            f = open('scan/{}.csv'.format(scan_name), 'w+')
+            csv.writer(f, delimiter=',').writerows(vals)
+            f.close()
+
+    def __flush_logs(self, f, log_queue):
+        logs = list(drain_queue(log_queue))
+        if f is None: return
+        for log in logs: f.write(log + '\n')
+        f.flush()
+        os.fsync(f)
+
+
+class PipelineScanner(ScannerBase):
+
+    def run(self):
+        return self.pipeline.run()
+
+    def run_iter(self):
+        return self.pipeline.run_iter()
+
+    @property
+    def symbols(self):
+        return self.pipeline.history.symbols
+
+    @property
+    def fetch_failure_count(self):
+        return self.pipeline.fetch_failure_count
+
+    @property
+    def analysis_failure_count(self):
+        return self.pipeline.analysis_failure_count
+
+
+class OptionChainFetcher:
+
+    def __init__(self,
+        option_api,
+        api_limiter,
+        chain_cache,
+        greeks,
+
+        max_fetch_attempts=5
+    ):
+
+        self.option_api = option_api
+        self.api_limiter = api_limiter
+        self.chain_cache = chain_cache
+        self.greeks = greeks
+
+        self.max_fetch_attempts = max_fetch_attempts
+
+    def fetch_expirations(self, symbol):
+
+        # serve cached expirations
+        if self.chain_cache is not None:
+            return self.chain_cache.fetch_expirations(symbol,
+                lambda: self.__request(self.option_api.fetch_expirations, symbol))
+        return self.__request(self.option_api.fetch_expirations, symbol)
+
+    def fetch_chain(self, symbol, expiration):
+
+        # serve cached chain
+        if self.chain_cache is not None:
+            return self.chain_cache.fetch_chain(symbol, expiration,
+                lambda: self.__request(self.option_api.fetch_chain, symbol, expiration, greeks=self.greeks),
+                greeks=self.greeks)
+        return self.__request(self.option_api.fetch_chain, symbol, expiration, greeks=self.greeks)
+
+    def close(self):
+
+        # wait for cache refreshes & flush recordings
+        if self.chain_cache is not None: self.chain_cache.close()
+        self.option_api.close()
+
+    def __request(self, fetch_fn, *args, **kwargs):
+        data = None
+        attempts = 0
+
+        # retry api fetch
+        while data is None:
+            if attempts >= self.max_fetch_attempts: return None
+
+            # acquire api call
+            self.api_limiter.acquire()
+            fetch_results = fetch_fn(*args, **kwargs)
+            attempts += 1
+
+            # validate fetch results
+            if fetch_results is not None:
+                data, available, allowed, expiry = fetch_results
+                self.api_limiter.update(available, allowed, expiry)
+
+        return data
+
+
+class PipelineWorkerProcess(multiprocessing.Process):
+
+    def __init__(self,
+        process_num,
+        kernel,
+        history,
+        fetcher,
+        dividend_api,
+        symbol_queue,
+        chain_queue,
+        result_queue,
+        fetch_failure_counter,
+        analysis_failure_counter,
+        log_queue,
+        manual_greeks
+    ):
+
+        multiprocessing.Process.__init__(self)
+        self.process_num = process_num
+        self.kernel = kernel
+        self.history = history
+        self.fetcher = fetcher
+        self.dividend_api = dividend_api
+        self.symbol_queue = symbol_queue
+        self.chain_queue = chain_queue
+        self.result_queue = result_queue
+        self.fetch_failure_counter = fetch_failure_counter
+        self.analysis_failure_counter = analysis_failure_counter
+        self.log_queue = log_queue
+        self.manual_greeks = manual_greeks
+        self.process_name = self.kernel.__class__.__name__ + str(self.process_num)
+
+    def run(self):
+        self.__log_message('INFO', 'starting scanner process')
+        self.kernel.setup()
+
+        # iteratively execute tasks
+        while True:
+
+            # consume prefetched chains
+            if self.chain_queue is not None:
+                task = self.chain_queue.get()
+                if task is None: break
+                self.__execute_task(*task)
+                continue
+
+            try: symbol = self.symbol_queue.get(block=False)
+            except Empty: break
+            self.__execute_task(symbol)
+            self.symbol_queue.task_done()
+
+        # wait for cache refreshes
+        if self.fetcher is not None: self.fetcher.close()
+
+        self.__log_message('INFO', 'shutting down scanner process')
+
+    def __execute_task(self, symbol, chains=None):
+
+        # load symbol inputs
+        context = self.__load_context(symbol)
+        if context is None: return
+
+        # analyze symbol without chains
+        if self.kernel.dte_window is None:
+            try: self.result_queue.put({symbol: self.kernel.analyze_symbol(symbol, context)})
+            except Exception as e:
+                self.__report_analysis_failure((symbol,), str(e))
+            return
+
+        # fetch chains
+        if chains is None: chains = self.__fetch_chains(symbol)
+        kernels = self.kernel.route(symbol, context)
+
+        # iterate over chains
+        symbol_results = {kernel: {} for kernel in kernels}
+        for expiration, chain in chains:
+            chain_results = {}
+
+            # fan chain out to strategy kernels
+            for kernel in kernels:
+                if not kernel.validate_expiration(expiration): continue
+                key = (symbol, expiration)
+
+                # run analysis
+                try:
+                    result = kernel.analyze_chain(symbol, expiration, chain, context)
+                    if result is None: continue
+                    if kernel.batches_symbols(): symbol_results[kernel][key] = result
+                    else: chain_results[self.kernel.result_key(kernel, key)] = result
+                except Exception as e:
+                    self.__report_analysis_failure(self.kernel.result_key(kernel, key), str(e))
+
+            # stream chain results to parent
+            if len(chain_results) > 0: self.result_queue.put(chain_results)
+
+        # finish symbol & stream batched results to parent
+        for kernel in kernels:
+            selected = kernel.finish_symbol(symbol_results[kernel])
+            if len(selected) == 0: continue
+            self.result_queue.put({self.kernel.result_key(kernel, k): v for k, v in selected.items()})
+
+    def __load_context(self, symbol):
+        if not self.kernel.validate_symbol(symbol): return None
+        context = {}
+
+        # fetch underlying
+        if self.kernel.needs_underlying:
+            underlying = self.history.last(symbol)
+            if underlying is None:
+                self.__report_fetch_failure('underlying', (symbol,))
+                return None
+
+            # fetch dividend
+            if not self.kernel.validate_underlying(underlying): return None
+            if self.manual_greeks:
+                dividend = self.dividend_api.fetch_annual_yield(symbol)
+            else: dividend = 0.0
+            context['underlying'] = underlying
+            context['dividend'] = dividend
+
+        # fetch quotes
+        if self.kernel.needs_quotes:
+            quotes = self.history.get(symbol)
+            if quotes is None:
+                self.__report_fetch_failure('quotes', (symbol,))
+                return None
+            if not self.kernel.validate_quotes(quotes): return None
+            context['quotes'] = quotes
+
+        return context
+
+    def __fetch_chains(self, symbol):
+
+        # fetch expiration
+        expirations = self.fetcher.fetch_expirations(symbol)
+        if expirations is None:
+            self.__report_fetch_failure('expirations', (symbol,))
+            return
+
+        # iterate/validate expirations
+        for expiration in expirations:
+
+            # fetch chains
+            if not self.kernel.validate_expiration(expiration): continue
+            chain = self.fetcher.fetch_chain(symbol, expiration)
+            if chain is None:
+                self.__report_fetch_failure('chain', (symbol, expiration))
+                continue
+
+            yield expiration, chain
+
+    def __report_fetch_failure(self, component, fetch_data):
+        self.fetch_failure_counter.increment()
+        self.__log_message('ERROR', '{} fetch failed for {}'.format(
+            component, fetch_data))
+
+    def __report_analysis_failure(self, analysis_data, error_msg):
+        line_no = sys.exc_info()[-1].tb_lineno
+        self.analysis_failure_counter.increment()
+        self.__log_message('ERROR', 'analysis failed for {} with error \"{}\" at line {}'.format(
+            analysis_data, error_msg, line_no))
+
+    def __log_message(self, tag, msg):
+        log = str(datetime.today())
+        log += ' ' + tag
+        log += ' [' + self.process_name + ']'
+        log += ': ' + msg
+        self.log_queue.put(log)
+
+
+class AsyncChainFetchThread(threading.Thread):
+
+    def __init__(self,
+        option_api,
+        api_limiter,
+        chain_cache,
+        kernel,
+        history,
+        symbol_queue,
+        chain_queue,
+        fetch_failure_counter,
+        log_queue,
+        num_consumers,
+        greeks,
+
+        max_concurrency=50,
+        max_fetch_attempts=5,
+        hand_off_poll=0.01
+    ):
+
+        threading.Thread.__init__(self)
+        self.option_api = option_api
+        self.api_limiter = api_limiter
+        self.chain_cache = chain_cache
+        self.kernel = kernel
+        self.history = history
+        self.symbol_queue = symbol_queue
+        self.chain_queue = chain_queue
+        self.fetch_failure_counter = fetch_failure_counter
+        self.log_queue = log_queue
+        self.num_consumers = num_consumers
+        self.greeks = greeks
+
+        self.max_concurrency = max_concurrency
+        self.max_fetch_attempts = max_fetch_attempts
+        self.hand_off_poll = hand_off_poll
+        self.thread_name = self.__class__.__name__
+
+        # build cancellation & error state
+        self.stop_event = threading.Event()
+        self.loop, self.task = None, None
+        self.error = None
+
+    def run(self):
+        self.__log_message('INFO', 'starting fetch thread')
+
+        # fetch universe on event loop
+        try: asyncio.run(self.__fetch_universe())
+        except asyncio.CancelledError: pass
+        except Exception as e:
+            self.error = e
+            self.__log_message('ERROR', 'fetch thread failed: {}'.format(e))
+        finally:
+
+            # release scanner processes
+            for _ in range(self.num_consumers):
+                while not self.stop_event.is_set():
+                    try: self.chain_queue.put(None, timeout=self.hand_off_poll)
+                    except Full: continue
+                    break
+
+        self.__log_message('INFO', 'shutting down fetch thread')
+
+    def stop(self):
+        self.stop_event.set()
+
+        # cancel in-flight fetches
+        loop, task = self.loop, self.task
+        if loop is not None and task is not None:
+            try: loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError: pass
+
+    async def __fetch_universe(self):
+        self.request_semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.loop, self.task = asyncio.get_running_loop(), asyncio.current_task()
+        self.refreshes = []
+        if self.stop_event.is_set(): return
+
+        # run concurrent symbol fetchers
+        async with self.option_api:
+            await asyncio.gather(*[
+                self.__fetch_symbols() for _ in range(self.max_concurrency)
+            ])
+
+            # wait for stale chain refreshes
+            await asyncio.gather(*self.refreshes)
+
+    async def __fetch_symbols(self):
+        while not self.stop_event.is_set():
+            try: symbol = self.symbol_queue.get(block=False)
+            except Empty: break
+
+            # fetch symbol chains
+            try: await self.__fetch_symbol(symbol)
+            except Exception:
+                self.__report_fetch_failure('symbol', (symbol,))
+            finally: self.symbol_queue.task_done()
+
+    async def __fetch_symbol(self, symbol):
+        if not self.kernel.validate_symbol(symbol): return
+
+        # leave rejected symbols to scanner processes
+        if not self.__validate_inputs(symbol):
+            await self.__hand_off(symbol, [])
+            return
+
+        # fetch expirations
+        expirations = await self.__fetch_expirations(symbol)
+        if expirations is None:
+            self.__report_fetch_failure('expirations', (symbol,))
+            return
+
+        # fetch chains concurrently
+        expirations = [e for e in expirations if self.kernel.validate_expiration(e)]
+        chains = await asyncio.gather(*[
+            self.__fetch_chain(symbol, e) for e in expirations
+        ])
+
+        # hand off decoded chains
+        fetched_chains = []
+        for expiration, chain in zip(expirations, chains):
+            if chain is None:
+                self.__report_fetch_failure('chain', (symbol, expiration))
+            else: fetched_chains.append((expiration, chain))
+        await self.__hand_off(symbol, fetched_chains)
+
+    async def __hand_off(self, symbol, chains):
+
+        # wait for queue space without blocking the loop
+        while not self.stop_event.is_set():
+            try: self.chain_queue.put((symbol, chains), block=False)
+            except Full:
+                await asyncio.sleep(self.hand_off_poll)
+                continue
+            break
+
+    def __validate_inputs(self, symbol):
+
+        # validate underlying
+        if self.kernel.needs_underlying:
+            underlying = self.history.last(symbol)
+            if underlying is None: return False
+            if not self.kernel.validate_underlying(underlying): return False
+
+        # validate quotes
+        if self.kernel.needs_quotes:
+            quotes = self.history.get(symbol)
+            if quotes is None: return False
+            if not self.kernel.validate_quotes(quotes): return False
+
+        return True
+
+    async def __fetch_expirations(self, symbol):
+
+        # serve today's cached expirations
+        if self.chain_cache is not None:
+            expirations = self.chain_cache.load_expirations(symbol)
+            if expirations is not None: return expirations
+
+        # fetch and store expirations
+        expirations = await self.__fetch(self.option_api.fetch_expirations, symbol)
+        if expirations is not None and self.chain_cache is not None:
+            self.chain_cache.save_expirations(symbol, expirations)
+        return expirations
+
+    async def __fetch_chain(self, symbol, expiration):
+
+        # serve fresh cached chain
+        if self.chain_cache is not None:
+            chain = self.chain_cache.load_chain(symbol, expiration, self.greeks)
+            if chain is not None: return chain
+
+            # serve stale chain while refreshing
+            chain = self.chain_cache.load_stale_chain(symbol, expiration, self.greeks)
+            if chain is not None:
+                self.refreshes.append(asyncio.ensure_future(self.__refresh_chain(symbol, expiration)))
+                return chain
+
+        return await self.__refresh_chain(symbol, expiration)
+
+    async def __refresh_chain(self, symbol, expiration):
+
+        # fetch and store chain
+        chain = await self.__fetch(self.option_api.fetch_chain, symbol, expiration, self.greeks)
+        if chain is not None and self.chain_cache is not None:
+            self.chain_cache.save_chain(symbol, expiration, chain, self.greeks)
+        return chain
+
+    async def __fetch(self, fetch_fn, *args):
+        attempts = 0
+
+        # retry api fetch
+        while attempts < self.max_fetch_attempts:
+            await self.api_limiter.acquire_async()
+            async with self.request_semaphore:
+                fetch_results = await fetch_fn(*args)
+            attempts += 1
+
+            # validate fetch results
+            if fetch_results is not None:
+                data, available, allowed, expiry = fetch_results
+                self.api_limiter.update(available, allowed, expiry)
+                return data
+
+        return None
+
+    def __report_fetch_failure(self, component, fetch_data):
+        self.fetch_failure_counter.increment()
+        self.__log_message('ERROR', '{} fetch failed for {}'.format(
+            component, fetch_data))
+
+    def __log_message(self, tag, msg):
+        log = str(datetime.today())
+        log += ' ' + tag
+        log += ' [' + self.thread_name + ']'
+        log += ': ' + msg
+        self.log_queue.put(log)
@@ -1,6 +1,11 @@
 from src.scanner.base import ScannerBase
+from src.api.chaincache import ChainCache
 from src.api.tradier import TradierAPI
 from src.api.yfinance import YFinanceAPI
+from src.api.atomicfinance import AtomicYFinanceAPI
+from src.api.ycharts import YChartsAPI
+from src.util.chain import ChainColumns
+from src.util.bsm import bsm_chain_greeks
 from datetime import datetime, date
 from scipy.stats import norm
 import numpy as np
@@ -14,11 +19,14 @@ class WheelCallScanner(ScannerBase):
         cost_basis,
         save_scan=True,
         scan_name=None,
+        manual_greeks=False,
 
         option_price_floor=0.10,
         open_interest_floor=3,
         volume_floor=3,
-        strike_threshold=0.05
+        strike_threshold=0.05,
+        use_cache=False,
+        cache_ttl=300.0
     ):
 
         self.put_ticker = put_ticker
@@ -26,11 +34,14 @@ class WheelCallScanner(ScannerBase):
         self.cost_basis = cost_basis
         self.save_scan = save_scan
         self.scan_name = scan_name
+        self.manual_greeks = manual_greeks
 
         self.option_price_floor = option_price_floor
         self.open_interest_floor = open_interest_floor
         self.volume_floor = volume_floor
         self.strike_threshold = strike_threshold
+        self.use_cache = use_cache
+        self.cache_ttl = cache_ttl
 
         # build scan name
         if self.scan_name is None:
@@ -44,11 +55,18 @@ class WheelCallScanner(ScannerBase):
         # build resources
         self.option_api = TradierAPI()
         self.stock_api = YFinanceAPI()
+        if self.use_cache: self.chain_cache = ChainCache(ttl=self.cache_ttl)
+        else: self.chain_cache = None
         results = []
 
+        # fetch greeks inputs
+        if self.manual_greeks:
+            self.risk_free_rate = YChartsAPI().fetch_risk_free_rate()
+            self.dividend = AtomicYFinanceAPI().fetch_annual_yield(self.put_ticker)
+
         # pull underyling and option expirations
         underlying = self.stock_api.fetch_last_quote(self.put_ticker)
-        expirations = self.option_api.fetch_expirations(self.put_ticker)[0]
+        expirations = self.__fetch_expirations(self.put_ticker)
         for expiration in expirations:
 
             # target dte range
@@ -58,10 +76,12 @@ class WheelCallScanner(ScannerBase):
             if dte >= 60: continue
 
             # iterate over chain levels
-            chain = self.option_api.fetch_chain(self.put_ticker, expiration)[0]
-            for level in chain:
+            chain = self.__fetch_chain(self.put_ticker, expiration)
+            greeks = self.__load_greeks(underlying, chain, dte)
+            for i, level in enumerate(chain):
                 if not self.__filter_call_levels(self.put_ticker, underlying, level):
                     continue
+                if not greeks['valid'][i]: continue
 
                 # calculate contract stats
                 premium = level['bid']
@@ -73,9 +93,9 @@ class WheelCallScanner(ScannerBase):
                 if moneyness > (1 + self.strike_threshold): continue
 
                 # calculate movement stats
-                iv = level['greeks']['bid_iv']
+                iv = greeks['iv'][i]
                 std = underlying * iv * np.sqrt(dte / 365)
-                prob_itm_delta = level['greeks']['delta']
+                prob_itm_delta = greeks['delta'][i]
                 prob_itm_iv = norm.cdf((level['strike'] - underlying) / std)
                 
                 # save results
@@ -92,6 +112,7 @@ class WheelCallScanner(ScannerBase):
                     round(prob_itm_iv, 5), # probability of itm (with iv)
                     round(iv, 5), # contract implied volatility (percentage)
                 ])
+        self.option_api.close()
 
         # save results
         if self.save_scan:
@@ -101,6 +122,30 @@ class WheelCallScanner(ScannerBase):
             'results': results
         }
 
+    def __fetch_expirations(self, symbol):
+        fetch_fn = lambda: self.option_api.fetch_expirations(symbol)[0]
+        if self.chain_cache is None: return fetch_fn()
+        return self.chain_cache.fetch_expirations(symbol, fetch_fn)
+
+    def __fetch_chain(self, symbol, expiration):
+        greeks = not self.manual_greeks
+        fetch_fn = lambda: self.option_api.fetch_chain(symbol, expiration, greeks=greeks)[0]
+        if self.chain_cache is None: return fetch_fn()
+        return self.chain_cache.fetch_chain(symbol, expiration, fetch_fn, greeks=greeks)
+
+    def __load_greeks(self, underlying, chain, dte):
+        if not self.manual_greeks:
+            return {
+                'valid': [level['greeks'] is not None for level in chain],
+                'iv': [(level['greeks'] or {}).get('bid_iv') for level in chain],
+                'delta': [(level['greeks'] or {}).get('delta') for level in chain]
+            }
+
+        # solve chain greeks in one pass
+        cols = ChainColumns(chain)
+        return bsm_chain_greeks(cols.last, underlying, cols.strike, 
+            dte / 365.0, self.risk_free_rate, self.dividend, cols.is_put)
+
     def __filter_call_levels(self, symbol, underlying, level):
         if level['option_type'] != 'call': return False # ignore put options
         if level['root_symbol'] != symbol: return False # ignore adjusted options
@@ -1,33 +1,16 @@
-from py_vollib.black_scholes_merton.implied_volatility import implied_volatility
-from py_vollib.black_scholes_merton.greeks import analytical
-from sklearn.linear_model import LinearRegression
-import numpy.polynomial.polynomial as poly
-from src.scanner.base import ScannerBase
-from src.api.atomicfinance import AtomicYFinanceAPI
-from src.util.atomic import AtomicBool
-from src.api.tradier import TradierAPI
-from src.api.yfinance import YFinanceAPI
-from src.api.ycharts import YChartsAPI
+from src.scanner.pipeline import PipelineScanner, ScannerPipeline, UniverseSource, StrategyKernel, RecordSink
+from src.util.chain import ChainColumns
+from src.util.analytics import expected_moves
+from src.util.calendar import MarketCalendar
+from src.util.records import put_contract_dtype, empty_records, concat_records
+from src.util.curve import DeltaCurve
+from src.util.selection import select_top_k
 from datetime import datetime, date
-from itertools import permutations
-from scipy.stats import pearsonr
-from queue import Queue, Empty
 from scipy.stats import norm
-from numpy import warnings
-from pathlib import Path
-import multiprocessing
-from tqdm import tqdm
-import pandas as pd
 import numpy as np
-import threading
-import math
-import time
-import csv
-import sys
-import os
 
 
-class WheelPutScanner(ScannerBase):
+class WheelPutScanner(PipelineScanner):
 
     def __init__(self, 
         uni_list=None, 
@@ -38,426 +21,139 @@ class WheelPutScanner(ScannerBase):
         log_changes=True,
         manual_greeks=False,
         scan_name=None,
-        prog_bar=True
+        prog_bar=True,
+        async_fetch=False,
+        max_concurrency=50,
+        use_cache=False,
+        cache_ttl=300.0,
+        stale_while_revalidate=False,
+        contract_filter=None,
+        rank_key=None,
+        top_k=None
     ):
 
-        self.uni_list = uni_list
-        self.uni_file = uni_file
-        self.price_cap = price_cap
-        self.num_processes = num_processes
-        self.save_scan = save_scan
-        self.log_changes = log_changes
-        self.manual_greeks = manual_greeks
-        self.scan_name = scan_name
-        self.prog_bar = prog_bar
-
-        # fetch universe
-        if self.uni_file is not None:
-            f = open(self.uni_file, 'r')
-            uni_list = list(csv.reader(f))
-            self.uni = [row[0] for row in uni_list]        
-            f.close()
-        elif self.uni_list is not None:
-            self.uni = self.uni_list
-        else:
-            raise Exception('No universe specified.')
-
-        # build scan name
-        if self.scan_name is None:
-            k = 'wheelput'
-            d = str(datetime.today()).split(' ')[0]
-            t = str(datetime.today()).split(' ')[-1].split('.')[0]
-            self.scan_name = '{}_{}_{}'.format(k, d, t)
-
-    def run(self):
-
-        # build resources
-        option_api = TradierAPI()
-        stock_api = YFinanceAPI()
-        dividend_api = AtomicYFinanceAPI()
-        risk_free_rate_api = YChartsAPI()
-        manager = multiprocessing.Manager()
-        symbol_queue = manager.Queue()
-        api_rate_cv = manager.Condition()
-        api_rate_avail = manager.Value('i', 200)
-        result_map = manager.dict()
-        director_exit_flag = AtomicBool(value=False)
-
-        # build meta resources
-        fetch_failure_counter = manager.Value('i', 0)
-        analysis_failure_counter = manager.Value('i', 0)
-        log_queue = manager.Queue()
-
-        # fetch risk-free rate
-        if self.manual_greeks: 
-            risk_free_rate = risk_free_rate_api.fetch_risk_free_rate()
-        else: risk_free_rate = 0.0
-
-        # load queue
-        for symbol in self.uni:
-            symbol_queue.put(symbol)
-
-        # run scanner threads
-        s_processes = []
-        for i in range(self.num_processes):
-            s_process = WheelScannerWorkerProcess(
-                process_num=i + 1, 
-                option_api=option_api, 
-                stock_api=stock_api,
-                dividend_api=dividend_api,
-                symbol_queue=symbol_queue, 
-                api_rate_cv=api_rate_cv,
-                api_rate_avail=api_rate_avail,
-                result_map=result_map,
-                fetch_failure_counter=fetch_failure_counter,
-                analysis_failure_counter=analysis_failure_counter,
-                log_queue=log_queue,
-                price_cap=self.price_cap,
-                risk_free_rate=risk_free_rate,
-                manual_greeks=self.manual_greeks
-            )
-            s_process.start()
-            s_processes.append(s_process)
-
-        # run director thread
-        d_thread = WheelScannerDirectorThread(
-            api_rate_cv=api_rate_cv,
-            api_rate_avail=api_rate_avail,
-            exit_flag=director_exit_flag,
-            log_queue=log_queue
+        # validate contract selection
+        if top_k is not None and rank_key is None:
+            raise Exception('No rank key specified.')
+
+        # build scanner pipeline
+        universe = UniverseSource(uni_list=uni_list, uni_file=uni_file)
+        self.pipeline = ScannerPipeline(
+            universe=universe,
+            kernel=WheelPutKernel(
+                price_cap=price_cap,
+                manual_greeks=manual_greeks,
+                contract_filter=contract_filter,
+                rank_key=rank_key,
+                top_k=top_k
+            ),
+            sink=RecordSink(capacity=32 * len(universe.symbols), rank_key=rank_key),
+            num_processes=num_processes,
+            save_scan=save_scan,
+            log_changes=log_changes,
+            manual_greeks=manual_greeks,
+            scan_name=scan_name,
+            prog_bar=prog_bar,
+            async_fetch=async_fetch,
+            max_concurrency=max_concurrency,
+            use_cache=use_cache,
+            cache_ttl=cache_ttl,
+            stale_while_revalidate=stale_while_revalidate
         )
-        d_thread.start()
-
-        # run progress bar
-        self.__run_progress_bar(symbol_queue, log_queue, s_processes, 
-            d_thread, director_exit_flag)
-
-        # save results
-        if self.save_scan:
-            self.__save_scan(result_map._getvalue())
-
-        return {
-            'results': result_map._getvalue(),
-            'fetch_failure_count': fetch_failure_counter.value,
-            'analysis_failure_count': analysis_failure_counter.value
-        }
-
-    def __run_progress_bar(self, symbol_queue, log_queue, s_processes, 
-        d_thread, director_exit_flag):
-
-        size = symbol_queue.qsize()
-        if self.prog_bar: pbar = tqdm(total=size)
-
-        # build log file
-        if self.log_changes:
-            Path('log').mkdir(exist_ok=True)
-            f = open('log/{}.log'.format(self.scan_name), 'w+')
-
-        # update prog bar
-        while not symbol_queue.empty():
-            if self.log_changes: self.__flush_logs(f, log_queue)
-            new_size = symbol_queue.qsize()
-            if self.prog_bar: pbar.update(size - new_size)
-            size = new_size
-            time.sleep(0.1)
-        new_size = symbol_queue.qsize()
-        if self.prog_bar: pbar.update(size - new_size)
-
-        # wait for queue
-        symbol_queue.join()
-        if self.prog_bar: pbar.close()
-
-        # wait for threads
-        for p in s_processes: p.join()
-        director_exit_flag.update(True)
-        d_thread.join()
-
-        # flush logs
-        if self.log_changes:
-            self.__flush_logs(f, log_queue)
-            f.close()
 
-    def __save_scan(self, scan):
-        vals = sum(scan.values(), [])
 
-        # save file
-        Path('scan').mkdir(exist_ok=True)
-        f = open('scan/{}.csv'.format(self.scan_name), 'w+')
-        csv.writer(f, delimiter=',').writerows(vals)
-        f.close()
+class WheelPutKernel(StrategyKernel):
 
-    def __flush_logs(self, f, log_queue):
-        while not log_queue.empty():
-            f.write(log_queue.get() + '\n')
-        f.flush()
-        os.fsync(f)
+    name = 'wheelput'
+    dte_window = (6, 42)
+    needs_quotes = True
+    needs_analytics = True
 
+    def __init__(self,
+        price_cap=None,
+        manual_greeks=False,
+        contract_filter=None,
+        rank_key=None,
+        top_k=None,
 
-class WheelScannerWorkerProcess(multiprocessing.Process):
-
-    def __init__(self, 
-        process_num, 
-        option_api,
-        stock_api,
-        dividend_api,
-        symbol_queue, 
-        api_rate_cv,
-        api_rate_avail,
-        result_map,
-        fetch_failure_counter,
-        analysis_failure_counter,
-        log_queue,
-        price_cap,
-        risk_free_rate,
-        manual_greeks,
-
-        max_fetch_attempts=5,
         min_filtered_levels=5,
         option_price_floor=0.10,
         open_interest_floor=3,
         volume_floor=3,
-        index='SPY',
-        regression_range=30,
-        volatility_period=30
+        max_move_horizon=42
     ):
 
-        multiprocessing.Process.__init__(self)
-        self.process_num = process_num
-        self.option_api = option_api
-        self.stock_api = stock_api
-        self.dividend_api = dividend_api
-        self.symbol_queue = symbol_queue
-        self.api_rate_cv = api_rate_cv
-        self.api_rate_avail = api_rate_avail
-        self.result_map = result_map
-        self.fetch_failure_counter = fetch_failure_counter
-        self.analysis_failure_counter = analysis_failure_counter
-        self.log_queue=log_queue
         self.price_cap = price_cap
-        self.risk_free_rate = risk_free_rate
         self.manual_greeks = manual_greeks
+        self.contract_filter = contract_filter
+        self.rank_key = rank_key
+        self.top_k = top_k
 
-        self.max_fetch_attempts = max_fetch_attempts
         self.min_filtered_levels = min_filtered_levels
         self.option_price_floor = option_price_floor
         self.open_interest_floor = open_interest_floor
         self.volume_floor = volume_floor
-        self.index = index
-        self.regression_range = regression_range
-        self.volatility_period = volatility_period
-        self.process_name = self.__class__.__name__ + str(self.process_num)
-
-    def run(self):
-        self.__log_message('INFO', 'starting scanner process')
-        self.complete_symbols = {}
-
-        # iteratively execute tasks
-        if self.__fetch_index():
-            while True:
-                try: symbol = self.symbol_queue.get(block=False)
-                except Empty: break
-                self.__execute_task(symbol)
-                self.symbol_queue.task_done()
-
-        self.__log_message('INFO', 'shutting down scanner process')
-
-    def __execute_task(self, symbol):
-
-        # fetch underlying
-        if not self.__validate_symbol(symbol): return
-        underlying = self.__fetch_underlying(symbol)
-        if underlying is None:
-            self.__report_fetch_failure('underlying', (symbol,))
-            return
-
-        # fetch dividend
-        if not self.__validate_underlying(underlying): return
-        if self.manual_greeks: 
-            dividend = self.dividend_api.fetch_annual_yield(symbol)
-        else: dividend = 0.0
-        
-        # fetch quotes
-        quotes = self.__fetch_quotes(symbol)
-        if quotes is None: 
-            self.__report_fetch_failure('quotes', (symbol,))
-            return
-
-        # fetch expiration
-        if not self.__validate_quotes(quotes): return
-        expirations = self.__fetch_expirations(symbol)
-        if expirations is None:
-            self.__report_fetch_failure('expirations', (symbol,))
-            return
-
-        # iterate/validate expirations
-        for expiration in expirations:
-
-            # fetch chains
-            if not self.__validate_expiration(expiration): continue
-            chain = self.__fetch_chain(symbol, expiration)
-            if chain is None: 
-                self.__report_fetch_failure('chain', (symbol, expiration))
-                continue
-
-            # run analysis
-            try:
-
-                # analyze options chain
-                contracts, atm_iv, be = self.__analyze_chain(
-                    symbol=symbol, 
-                    underlying=underlying, 
-                    dividend=dividend, 
-                    expiration=expiration, 
-                    chain=chain, 
-                    risk_free_rate=self.risk_free_rate
-                )
-
-                # analyze underlying quotes
-                if len(contracts) == 0: continue
-                quotes_data = self.__analyze_quotes(
-                    symbol=symbol,
-                    quotes=quotes,
-                    expiration=expiration,
-                    atm_iv=atm_iv,
-                    be=be
-                )
-
-                # compile analysis data
-                contracts = [c + quotes_data for c in contracts]
-                self.result_map[(symbol, expiration)] = contracts
-
-            except Exception as e:
-                self.__report_analysis_failure((symbol, expiration), str(e))
-
-        return True
-
-    def __validate_symbol(self, symbol):
-
-        # ignore toronto exchange
-        if symbol.endswith('.TO'): return False
-        else: return True
+        self.max_move_horizon = max_move_horizon
 
-    def __validate_underlying(self, underlying):
+    def setup(self):
+        self.move_tables = {}
+
+    def validate_underlying(self, underlying):
 
         # cap stock prices
         if self.price_cap is None: return True
         if underlying > self.price_cap: return False
         else: return True
 
-    def __validate_expiration(self, expiration):
+    def batches_symbols(self):
 
-        # get dte
-        now_dt = date.today()
-        exp_dt = datetime.strptime(expiration, '%Y-%m-%d').date()
-        dte = (exp_dt - now_dt).days
+        # stream chains unless selecting per symbol
+        return self.contract_filter is not None or self.rank_key is not None
 
-        # target dte range
-        if dte < 6 or dte > 42: return False
-        else: return True
+    def analyze_chain(self, symbol, expiration, chain, context):
 
-    def __validate_quotes(self, quotes):
-        return len(quotes) == len(self.index_quotes)
+        # analyze options chain
+        contracts, atm_iv, be = self.__analyze_chain(
+            symbol=symbol, 
+            underlying=context['underlying'], 
+            dividend=context['dividend'], 
+            expiration=expiration, 
+            chain=chain, 
+            risk_free_rate=self.risk_free_rate
+        )
 
-    def __fetch_index(self):
+        # analyze underlying quotes
+        if len(contracts) == 0: return None
+        quotes_data = self.__analyze_quotes(
+            symbol=symbol,
+            quotes=context['quotes'],
+            expiration=expiration,
+            atm_iv=atm_iv,
+            be=be
+        )
 
-        # pull year quotes
-        self.index_quotes = self.stock_api.fetch_year_quotes(self.index)
-        if self.index_quotes is None:
-            self.__report_fetch_failure('index', None)
-            return False
+        # compile analysis data
+        for field, value in quotes_data.items(): contracts[field] = value
+        return contracts
 
-        # convert prices to returns
-        self.index_rets = self.__convert_price_to_return(
-            np.array([q['close'] for q in self.index_quotes])
-        )
+    def finish_symbol(self, symbol_results):
 
-        return True
-    
-    def __fetch_expirations(self, symbol):
-        expirations = None
-        attempts = 0
-
-        # retry api fetch
-        while expirations is None:
-            if attempts >= self.max_fetch_attempts: return None
-
-            # acquire api call
-            self.__wait_api_rate()
-            fetch_results = self.option_api.fetch_expirations(symbol)
-            attempts += 1
-
-            # validate fetch results
-            if fetch_results is not None:
-                expirations, available, _, _ = fetch_results
-                self.api_rate_avail.value = available
-
-        return expirations
-
-    def __fetch_chain(self, symbol, expiration):
-        chain = None
-        attempts = 0
-
-        # retry api fetch
-        while chain is None:
-            if attempts >= self.max_fetch_attempts: return None
-
-            # acquire api call
-            self.__wait_api_rate()
-            fetch_results = self.option_api.fetch_chain(symbol, expiration)
-            attempts += 1
-
-            # validate fetch results
-            if fetch_results is not None:
-                chain, available, _, _ = fetch_results
-                self.api_rate_avail.value = available
-
-        return chain
-
-    def __fetch_underlying(self, symbol):
-        underlying = None
-        attempts = 0
-
-        # retry api fetch
-        while underlying is None:
-            if attempts >= self.max_fetch_attempts: return None
-            underlying = self.stock_api.fetch_last_quote(symbol)
-            attempts += 1
-
-        return underlying
-
-    def __fetch_quotes(self, symbol):
-        quotes = None
-        attempts = 0
-
-        # retry api fetch
-        while quotes is None:
-            if attempts >= self.max_fetch_attempts: return None
-            quotes = self.stock_api.fetch_year_quotes(symbol) 
-            attempts += 1
-            
-        return quotes
-
-    def __wait_api_rate(self):
-        with self.api_rate_cv:
-            self.api_rate_cv.wait()
-
-    def __report_fetch_failure(self, component, fetch_data):
-        self.fetch_failure_counter.value += 1
-        self.__log_message('ERROR', '{} fetch failed for {}'.format(
-            component, fetch_data))
-
-    def __report_analysis_failure(self, analysis_data, error_msg):
-        line_no = sys.exc_info()[-1].tb_lineno
-        self.analysis_failure_counter.value += 1
-        self.__log_message('ERROR', 'analysis failed for {} with error \"{}\" at line {}'.format(
-            analysis_data, error_msg, line_no))
-
-    def __log_message(self, tag, msg):
-        log = str(datetime.today())
-        log += ' ' + tag
-        log += ' [' + self.process_name + ']'
-        log += ': ' + msg
-        self.log_queue.put(log)
+        # drop symbol move table
+        self.move_tables.clear()
+        if not self.batches_symbols(): return symbol_results
+        records = concat_records(symbol_results)
+
+        # push down filters & ranking
+        if self.contract_filter is not None: records = records[self.contract_filter(records)]
+        if self.rank_key is not None: records = select_top_k(records, self.rank_key, self.top_k)
+
+        # regroup winners by chain
+        selected = {}
+        for key in symbol_results:
+            chain_records = records[records['expiration'] == np.datetime64(key[1])]
+            if len(chain_records) > 0: selected[key] = chain_records
+
+        return selected
 
     def __analyze_chain(self, 
         symbol, 
@@ -473,58 +169,54 @@ class WheelScannerWorkerProcess(multiprocessing.Process):
         exp_dt = datetime.strptime(expiration, '%Y-%m-%d').date()
         dte = (exp_dt - now_dt).days
 
-        # load greeks & iv skew
-        greeks_lookup = self.__load_greeks(underlying, dividend, chain, dte, risk_free_rate)
-        if len(greeks_lookup) < self.min_filtered_levels: return [], None, None
-        atm_iv = self.__get_atm_iv(chain, greeks_lookup)
+        # load columnar chain & greeks
+        cols = ChainColumns(chain)
+        greeks = cols.load_greeks(underlying, dividend, dte, risk_free_rate, self.manual_greeks)
+        if greeks['valid'].sum() < self.min_filtered_levels: return empty_records(), None, None
+        atm_iv = cols.atm_iv(greeks)
  
         # filter bad levels
-        filt_chain = []
-        for level in chain:
-            if self.__filter_put_levels(symbol, underlying, level):
-                filt_chain.append(level)
+        filt = cols.otm_puts(symbol, underlying, self.option_price_floor, self.open_interest_floor, self.volume_floor)
         
-        # build deta curve
-        coefs = self.__build_delta_curve(filt_chain, greeks_lookup)
-        if coefs is None: return [], None, None
-
-        # iterate over levels
-        contract_collection = []
-        for level in filt_chain:
-            if level['description'] not in greeks_lookup: 
-                continue
-            
-            # calculate contract stats
-            premium = level['bid']
-            be = level['strike'] - premium
-            prob_itm_delta = greeks_lookup[level['description']]['delta']
-            prob_be_delta = 1 - self.__interpolate_delta(be, coefs)
-            roc = (premium * 100) / (level['strike'] * 100)
-            
-            # calculate movement
-            iv = greeks_lookup[level['description']]['iv']
-            iv_skew = iv / atm_iv
-            std = underlying * atm_iv * np.sqrt(dte / 365)
-            prob_be_iv = 1 - norm.cdf((be - underlying) / std)
-            moneyness = level['strike'] / underlying
-
-            # save contract
-            contract_collection.append([
-                level['description'], # contract description
-                round(underlying, 2), # underlying price
-                round(premium * 100, 2), # upfront premium
-                round(dte, 0), # days to expiration
-                round(roc, 5), # return-on-capital
-                round(be, 2), # break-even price
-                round(moneyness, 5), # strike moneyness
-                round(prob_itm_delta, 5), # probability of itm (with delta)
-                round(prob_be_delta, 5), # probability of break-even (with delta) 
-                round(prob_be_iv, 5), # probability of break-even (with iv)
-                round(iv, 5), # contract implied volatility (percentage)
-                round(iv_skew, 5), # implied volatility skew
-            ])
-
-        return contract_collection, atm_iv, be
+        # build delta curve
+        curve = self.__build_delta_curve(cols, greeks, filt)
+        if curve is None: return empty_records(), None, None
+
+        # calculate contract stats
+        mask = filt & greeks['valid']
+        strike = cols.strike[mask]
+        premium = cols.bid[mask]
+        be = strike - premium
+        prob_itm_delta = greeks['delta'][mask]
+        prob_be_delta = 1 - self.__interpolate_delta(be, curve)
+        roc = (premium * 100) / (strike * 100)
+
+        # calculate movement
+        iv = greeks['iv'][mask]
+        iv_skew = iv / atm_iv
+        std = underlying * atm_iv * np.sqrt(dte / 365)
+        prob_be_iv = 1 - norm.cdf((be - underlying) / std)
+        moneyness = strike / underlying
+
+        # save contract records
+        contracts = np.zeros(strike.shape[0], dtype=put_contract_dtype)
+        contracts['symbol_id'] = self.history.columns[symbol] # interned symbol
+        contracts['expiration'] = np.datetime64(expiration, 'D') # expiration date
+        contracts['strike'] = strike # strike price
+        contracts['option_type'] = b'P' # option type
+        contracts['underlying'] = underlying # underlying price
+        contracts['premium'] = premium * 100 # upfront premium
+        contracts['dte'] = dte # days to expiration
+        contracts['roc'] = roc # return-on-capital
+        contracts['be'] = be # break-even price
+        contracts['moneyness'] = moneyness # strike moneyness
+        contracts['prob_itm_delta'] = prob_itm_delta # probability of itm (with delta)
+        contracts['prob_be_delta'] = prob_be_delta # probability of break-even (with delta)
+        contracts['prob_be_iv'] = prob_be_iv # probability of break-even (with iv)
+        contracts['iv'] = iv # contract implied volatility (percentage)
+        contracts['iv_skew'] = iv_skew # implied volatility skew
+
+        return contracts, atm_iv, be[-1]
 
     def __analyze_quotes(self,
         symbol,
@@ -534,251 +226,51 @@ class WheelScannerWorkerProcess(multiprocessing.Process):
         be
     ):
 
-        # calculate reg & corr & vol scores
-        if symbol not in self.complete_symbols:
-            quotes = np.array([q['close'] for q in quotes])
-            ret, score = self.__regress_range(quotes, self.regression_range)
-            symbol_rets = self.__convert_price_to_return(quotes)
-            corr = pearsonr(symbol_rets, self.index_rets)[0]
-            vols, curr_vol = self.__calc_vol_windows(symbol_rets)
-            self.complete_symbols[symbol] = (quotes, ret, score, corr, vols, curr_vol)
-        else:
-            quotes, ret, score, corr, vols, curr_vol = self.complete_symbols[symbol]
+        # lookup reg & corr & vol scores
+        stats = self.analytics.lookup(symbol)
+        ret, score, corr = stats['ret'], stats['score'], stats['corr']
+        vols, curr_vol = stats['vols'], stats['curr_vol']
             
         # calculate vol/be percentiles
-        hv_percentile = (vols < curr_vol).sum() / vols.shape[0]
+        hv_percentile = stats['hv_pct']
         iv_percentile = (vols < atm_iv).sum() / vols.shape[0]
         above_be_percentile = (quotes >= be).sum() / quotes.shape[0]
 
         # get 95% confidence move before dte
         exp_date = datetime.strptime(expiration, "%Y-%m-%d").date()
         cur_date = date.today()
-        bus_dte = np.busday_count(cur_date, exp_date)
-        quotes_arr = pd.DataFrame(np.array(quotes))
-        quotes_move = quotes_arr.pct_change(periods=bus_dte).dropna()
-        quotes_abs_move = np.abs(quotes_move.to_numpy())
-        exp_move_mean = quotes_abs_move.mean() 
-        exp_move_std = quotes_abs_move.std(ddof=1)
-        exp_move_conf = exp_move_mean + 1.2815 * exp_move_std
-
-        return [
-            round(ret, 5), # period return over regression range
-            round(score, 5), # regression score over regression range
-            round(corr, 5), # current annual market correlation
-            round(curr_vol, 5), # current historical volatility
-            round(hv_percentile, 5), # current implied volatility percentile
-            round(iv_percentile, 5), # current historical volatility percentile
-            round(above_be_percentile, 5), # annual closes above be percentile,
-            round(exp_move_conf, 5) # 95% confidence perc move before expiration
-        ]
-
-    def __regress_range(self, quotes, end_range, max_ret=1.0):
-         
-        # get variables
-        if end_range >= quotes.shape[0]: y = quotes
-        else: y = quotes[quotes.shape[0] - end_range:]
-        x = np.arange(y.shape[0]).reshape(-1, 1)
-
-        # get return
-        ret = (y[-1] - y[0]) / y[0]
-        if ret > max_ret: ret = max_ret
-        if ret < -max_ret: ret = -max_ret
-
-        # fit regression
-        reg = LinearRegression()
-        reg.fit(x, y).coef_[0]
-        score = reg.score(x, y)
-
-        return ret, score
-
-    def __convert_price_to_return(self, quotes):
-        last_quote = quotes[0]
-        rets = []
-
-        # iteratively convert p-to-r
-        for quote in quotes[1:]:
-            ret = (quote - last_quote) / last_quote
-            rets.append(ret)
-            last_quote = quote
-
-        return np.array(rets)
-
-    def __calc_vol_windows(self, symbol_rets):
-        ret_history = symbol_rets.shape[0]
-        vols = []
-
-        # calculate vols over moving period
-        for i in range(ret_history - self.volatility_period):
-            window = symbol_rets[i:i + self.volatility_period]
-            annualized_vol = np.std(window) * np.sqrt(ret_history)
-            vols.append(annualized_vol)
-        vols = np.array(vols) 
-        
-        return vols[:-1], vols[-1]
-    
-    def __load_greeks(self, underlying, dividend, chain, dte, risk_free_rate):
-        greeks_lookup = {}
-
-        # calculate greeks for chain
-        for level in chain:
-            try: greeks = self.__calculate_greeks(underlying, dividend, level, dte, risk_free_rate)
-            except: continue
-
-            # map contract description to greeks
-            greeks_lookup[level['description']] = greeks
-
-        return greeks_lookup
-
-    def __calculate_greeks(self, underlying, dividend, level, dte, risk_free_rate):
-        if not self.manual_greeks:
-            return {
-                'iv': level['greeks']['mid_iv'],
-                'delta': level['greeks']['delta'],
-                'theta': level['greeks']['theta'],
-                'vega': level['greeks']['vega'],
-                'gamma': level['greeks']['gamma'],
-                'rho': level['greeks']['rho']
-            }
-
-        # get BS components
-        price = level['last']
-        S = underlying
-        K = level['strike']
-        t = dte / 365.0
-        r = risk_free_rate
-        q = dividend
-        flag = 'p'
-
-        # calculate IV
-        sigma = implied_volatility(price, S, K, t, r, q, flag)
-
-        # map greeks
+        bus_dte = MarketCalendar.busday_count(cur_date, exp_date)
+        exp_move_conf = self.__lookup_expected_move(symbol, quotes, bus_dte)
+
         return {
-            'iv': sigma,
-            'delta': analytical.delta(flag, S, K, t, r, sigma, q),
-            'theta': analytical.theta(flag, S, K, t, r, sigma, q),
-            'vega': analytical.vega(flag, S, K, t, r, sigma, q),
-            'gamma': analytical.gamma(flag, S, K, t, r, sigma, q),
-            'rho': analytical.rho(flag, S, K, t, r, sigma, q)
+            'udl_year_ret': ret, # period return over regression range
+            'udl_year_ret_r2': score, # regression score over regression range
+            'udl_year_market_corr': corr, # current annual market correlation
+            'udl_hist_vol': curr_vol, # current historical volatility
+            'udl_hv_percentile': hv_percentile, # current historical volatility percentile
+            'udl_iv_percentile': iv_percentile, # current implied volatility percentile
+            'above_be_percentile': above_be_percentile, # annual closes above be percentile
+            'exp_move_conf': exp_move_conf # 95% confidence perc move before expiration
         }
 
-    def __get_atm_iv(self, chain, greeks_lookup):
-        delta_put_diff, delta_call_diff = float('inf'), float('inf')
-        delta_put_level, delta_call_level = None, None 
-
-        # iterate over raw chain
-        for level in chain:
-            if level['description'] not in greeks_lookup: 
-                continue
-
-            # find closest delta levels
-            diff = np.abs(np.abs(greeks_lookup[level['description']]['delta']) - 0.50)
-            if level['option_type'] == 'put':
-                if diff < delta_put_diff: 
-                    delta_put_diff = diff
-                    delta_put_level = level
-            elif level['option_type'] == 'call':
-                if diff < delta_call_diff: 
-                    delta_call_diff = diff
-                    delta_call_level = level
-
-        # calculate atm iv
-        atm_iv = (greeks_lookup[delta_put_level['description']]['iv'] + \
-            greeks_lookup[delta_call_level['description']]['iv']) / 2
-
-        return atm_iv
-
-    def __build_delta_curve(self, filt_chain, greeks_lookup):
-        fit_data = []
-        for level in filt_chain:
-            if level['description'] in greeks_lookup:
-                fit_data.append((
-                    level['strike'], 
-                    greeks_lookup[level['description']]['delta']
-                ))
-
-        # ensure enough fit data
-        if len(fit_data) < self.min_filtered_levels:
-            return None
-
-        # fit with dynamic order
-        fit_data = np.array(fit_data)
-        order, coefs = 11, None
-        with warnings.catch_warnings():
-            warnings.filterwarnings('error')
-            while coefs is None:
-                try: coefs = poly.polyfit(fit_data[:, 0], np.abs(fit_data[:, 1]), order)
-                except np.polynomial.polyutils.RankWarning: order -= 1
-        
-        return coefs
-
-    def __interpolate_delta(self, price, coefs):
-        return poly.polyval(price, coefs)
+    def __lookup_expected_move(self, symbol, quotes, bus_dte):
+        if bus_dte < 1 or bus_dte > self.max_move_horizon:
+            raise Exception('Expiration outside move horizons.')
 
-    def __filter_put_levels(self, symbol, underlying, level):
-        if level['option_type'] != 'put': return False # ignore call options
-        if underlying <= level['strike']: return False # ignore ATM/ITM options
-        if level['root_symbol'] != symbol: return False # ignore adjusted options
-        if level['last'] is None or level['last'] <= self.option_price_floor: return False # ignore low last price
-        if level['bid'] is None or level['bid'] <= self.option_price_floor: return False # ignore low bid price
-        if level['ask'] is None or level['ask'] <= self.option_price_floor: return False # ignore low ask price
-        if level['open_interest'] <= self.open_interest_floor: return False # ignore low open interest
-        if level['volume'] <= self.volume_floor: return False # ignore low volume
-        return True
+        # build move table once per symbol
+        if symbol not in self.move_tables:
+            self.move_tables[symbol] = expected_moves(quotes, self.max_move_horizon)
+        return self.move_tables[symbol][bus_dte]
 
+    def __build_delta_curve(self, cols, greeks, filt):
+        mask = filt & greeks['valid']
 
-class WheelScannerDirectorThread(threading.Thread):
-
-    def __init__(self,
-        api_rate_cv,
-        api_rate_avail,
-        exit_flag,
-        log_queue
-    ):
-
-        threading.Thread.__init__(self)
-        self.api_rate_cv = api_rate_cv
-        self.api_rate_avail = api_rate_avail
-        self.exit_flag = exit_flag
-        self.log_queue = log_queue
-
-        self.thread_name = self.__class__.__name__
-
-    def run(self):
-        self.__log_message('INFO', 'starting director thread')
-        last_rate = 0
+        # ensure enough fit data
+        if mask.sum() < self.min_filtered_levels:
+            return None
 
-        while True:
+        # fit monotone curve once per chain
+        return DeltaCurve(cols.strike[mask], greeks['delta'][mask])
 
-            # check exit condition
-            if self.exit_flag.get(): break
-            
-            # throttle api
-            available_rate = self.api_rate_avail.value
-            if available_rate > 100: current_rate = 500
-            elif available_rate <= 30: current_rate = 30
-            else: current_rate = 2 * available_rate
-
-            # log rate change
-            if last_rate != current_rate:
-                tag = 'WARNING' if current_rate <= 100 else 'INFO'
-                msg = 'api rate changed from {} to {}'.format(last_rate, current_rate)
-                self.__log_message(tag, msg)
-                last_rate = current_rate
-
-            # notify processes
-            time.sleep(60 / current_rate)
-            self.__notify_api_rate()
-
-        self.__log_message('INFO', 'shutting down director thread')
-
-    def __notify_api_rate(self):
-        with self.api_rate_cv:
-            self.api_rate_cv.notify(n=1)
-
-    def __log_message(self, tag, msg):
-        log = str(datetime.today())
-        log += ' ' + tag
-        log += ' [' + self.thread_name + ']'
-        log += ': ' + msg
-        self.log_queue.put(log)
\ No newline at end of file
+    def __interpolate_delta(self, price, curve):
+        return curve.evaluate(price)
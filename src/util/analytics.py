@@ -0,0 +1,140 @@
+from src.util.shared import SharedArray
+import numpy as np
+
+
+def price_returns(prices):
+
+    # simple returns along the day axis
+    prices = np.asarray(prices, dtype=np.float64)
+    return np.diff(prices, axis=-1) / prices[..., :-1]
+
+
+def rolling_sums(values, window):
+    values = np.asarray(values, dtype=np.float64)
+    pad = np.zeros(values.shape[:-1] + (1,))
+
+    # window sums from cumulative sums
+    cum = np.concatenate((pad, np.cumsum(values, axis=-1)), axis=-1)
+    return cum[..., window:] - cum[..., :-window]
+
+
+def rolling_mean(values, window):
+    return rolling_sums(values, window) / window
+
+
+def rolling_std(values, window, ddof=0):
+    values = np.asarray(values, dtype=np.float64)
+
+    # center rows to limit cancellation
+    centered = values - values.mean(axis=-1, keepdims=True)
+    mean = rolling_sums(centered, window) / window
+    sq_mean = rolling_sums(centered * centered, window) / window
+    var = np.maximum(sq_mean - mean * mean, 0.0) * window / (window - ddof)
+
+    return np.sqrt(var)
+
+
+def volatility_windows(rets, period):
+
+    # trailing windows scaled by return history
+    rets = np.asarray(rets, dtype=np.float64)
+    n_rets = rets.shape[-1]
+    vols = rolling_std(rets, period)[..., :n_rets - period]
+
+    return vols * np.sqrt(n_rets)
+
+
+def expected_moves(closes, max_horizon, z=1.2815):
+    closes = np.asarray(closes, dtype=np.float64)
+    n_days = closes.shape[-1]
+
+    # absolute moves for every horizon
+    horizons = np.arange(1, max_horizon + 1)
+    ends = np.arange(n_days)[None, :] + horizons[:, None]
+    valid = ends < n_days
+    moves = np.abs(closes[..., np.minimum(ends, n_days - 1)] / closes[..., None, :] - 1)
+
+    # confidence move per horizon
+    count = valid.sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(valid, moves, 0.0).sum(axis=-1) / count
+        dev = np.where(valid, moves - mean[..., None], 0.0)
+        std = np.sqrt((dev * dev).sum(axis=-1) / (count - 1))
+    table = mean + z * std
+
+    # index table by horizon
+    pad = np.full(table.shape[:-1] + (1,), np.nan)
+    return np.concatenate((pad, table), axis=-1)
+
+
+def regress_ranges(closes, end_range, max_ret=1.0):
+
+    # trailing range per row
+    closes = np.asarray(closes, dtype=np.float64)
+    y = closes[..., max(closes.shape[-1] - end_range, 0):]
+    x = np.arange(y.shape[-1], dtype=np.float64)
+
+    # clipped period return
+    ret = np.clip((y[..., -1] - y[..., 0]) / y[..., 0], -max_ret, max_ret)
+
+    # closed-form least squares r-squared
+    xc = x - x.mean()
+    yc = y - y.mean(axis=-1, keepdims=True)
+    sxy, sxx, syy = yc @ xc, xc @ xc, (yc * yc).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = np.where(syy > 0, sxy * sxy / (sxx * syy), 1.0)
+
+    return ret, score
+
+
+def market_correlations(rets, index_rets):
+
+    # center returns per row
+    rets = np.asarray(rets, dtype=np.float64)
+    rc = rets - rets.mean(axis=-1, keepdims=True)
+    ic = index_rets - index_rets.mean()
+
+    # correlation & beta via one product
+    cov = rc @ ic
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / (np.sqrt((rc * rc).sum(axis=-1)) * np.sqrt(ic @ ic))
+        beta = cov / (ic @ ic)
+
+    return corr, beta
+
+
+class UniverseAnalytics:
+
+    fields = ['ret', 'score', 'corr', 'beta', 'curr_vol', 'hv_pct']
+
+    def __init__(self, history, regression_range=30, volatility_period=30, max_ret=1.0):
+        self.columns = dict(history.columns)
+        closes = np.asarray(history.closes, dtype=np.float64).T
+
+        # universe return matrix
+        rets = price_returns(closes)
+        index_rets = rets[self.columns[history.index]]
+
+        # cross-sectional stats
+        ret, score = regress_ranges(closes, regression_range, max_ret)
+        corr, beta = market_correlations(rets, index_rets)
+        vols = volatility_windows(rets, volatility_period)
+        vols, curr_vol = vols[:, :-1], vols[:, -1]
+        hv_pct = (vols < curr_vol[:, None]).sum(axis=-1) / vols.shape[-1]
+
+        # publish to shared memory
+        self.stats = SharedArray(np.column_stack((ret, score, corr, beta, curr_vol, hv_pct)))
+        self.vols = SharedArray(vols)
+
+    def lookup(self, symbol):
+        col = self.columns.get(symbol)
+        if col is None: return None
+
+        # read precomputed row
+        row = dict(zip(self.fields, self.stats.view()[col].tolist()))
+        row['vols'] = self.vols.view()[col]
+        return row
+
+    def unlink(self):
+        self.stats.unlink()
+        self.vols.unlink()
@@ -0,0 +1,98 @@
+from scipy.stats import norm
+import numpy as np
+
+
+def bsm_d1_d2(S, K, t, r, sigma, q):
+    vol_t = sigma * np.sqrt(t)
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma ** 2) * t) / vol_t
+    return d1, d1 - vol_t
+
+
+def bsm_price(S, K, t, r, sigma, q, is_put):
+    d1, d2 = bsm_d1_d2(S, K, t, r, sigma, q)
+    fwd_S, disc_K = S * np.exp(-q * t), K * np.exp(-r * t)
+    call = fwd_S * norm.cdf(d1) - disc_K * norm.cdf(d2)
+    put = disc_K * norm.cdf(-d2) - fwd_S * norm.cdf(-d1)
+    return np.where(is_put, put, call)
+
+
+def bsm_greeks(S, K, t, r, sigma, q, is_put):
+    d1, d2 = bsm_d1_d2(S, K, t, r, sigma, q)
+    fwd_S, disc_K = S * np.exp(-q * t), K * np.exp(-r * t)
+    pdf_d1 = norm.pdf(d1)
+    cdf_d1, cdf_d2 = norm.cdf(d1), norm.cdf(d2)
+
+    # shared d1/d2 terms (py_vollib scaling)
+    decay = -fwd_S * pdf_d1 * sigma / (2 * np.sqrt(t))
+    call_theta = decay + q * fwd_S * cdf_d1 - r * disc_K * cdf_d2
+    put_theta = decay - q * fwd_S * (1 - cdf_d1) + r * disc_K * (1 - cdf_d2)
+    return {
+        'delta': np.where(is_put, np.exp(-q * t) * (cdf_d1 - 1), np.exp(-q * t) * cdf_d1),
+        'gamma': np.exp(-q * t) * pdf_d1 / (S * sigma * np.sqrt(t)),
+        'theta': np.where(is_put, put_theta, call_theta) / 365.0,
+        'vega': fwd_S * pdf_d1 * np.sqrt(t) * 0.01,
+        'rho': np.where(is_put, -t * disc_K * (1 - cdf_d2), t * disc_K * cdf_d2) * 0.01
+    }
+
+
+def bsm_implied_volatility(price, S, K, t, r, q, is_put,
+        min_vol=1e-4, max_vol=5.0, tol=1e-8, max_iter=100):
+
+    price, K, is_put = np.broadcast_arrays(
+        np.asarray(price, dtype=np.float64),
+        np.asarray(K, dtype=np.float64),
+        np.asarray(is_put, dtype=bool))
+
+    # reject prices outside no-arbitrage bounds
+    fwd_S, disc_K = S * np.exp(-q * t), K * np.exp(-r * t)
+    lower = np.maximum(np.where(is_put, disc_K - fwd_S, fwd_S - disc_K), 0.0)
+    upper = np.where(is_put, disc_K, fwd_S)
+    with np.errstate(invalid='ignore'):
+        solvable = (price > lower) & (price < upper) & (t > 0)
+    lo = np.full(price.shape, min_vol)
+    hi = np.full(price.shape, max_vol)
+    with np.errstate(all='ignore'):
+        solvable &= bsm_price(S, K, t, r, hi, q, is_put) >= price
+        solvable &= bsm_price(S, K, t, r, lo, q, is_put) <= price
+
+    # brenner-subrahmanyam initial guess
+    sigma = np.clip(np.sqrt(2 * np.pi / max(t, 1e-8)) * price / S, min_vol, max_vol)
+    sigma = np.where(solvable, sigma, np.nan)
+    converged = ~solvable
+
+    # safeguarded newton with bisection fallback
+    with np.errstate(all='ignore'):
+        for _ in range(max_iter):
+            diff = bsm_price(S, K, t, r, sigma, q, is_put) - price
+            converged |= np.abs(diff) < 1e-12
+            if converged.all(): break
+
+            # tighten bracket
+            hi = np.where(diff > 0, sigma, hi)
+            lo = np.where(diff < 0, sigma, lo)
+
+            # newton step inside bracket
+            d1, _ = bsm_d1_d2(S, K, t, r, sigma, q)
+            vega = fwd_S * norm.pdf(d1) * np.sqrt(t)
+            step = sigma - diff / vega
+            bisect = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+            step = np.where(bisect, 0.5 * (lo + hi), step)
+            converged |= np.abs(step - sigma) < tol
+            sigma = np.where(converged, sigma, step)
+
+    # drop non-convergent levels
+    return np.where(converged & solvable, sigma, np.nan)
+
+
+def bsm_chain_greeks(price, S, K, t, r, q, is_put):
+    sigma = bsm_implied_volatility(price, S, K, t, r, q, is_put)
+    valid = ~np.isnan(sigma)
+
+    # evaluate greeks on solved levels
+    with np.errstate(all='ignore'):
+        greeks = bsm_greeks(S, K, t, r, np.where(valid, sigma, 1.0), q, is_put)
+    for k in greeks: greeks[k] = np.where(valid, greeks[k], np.nan)
+    greeks['iv'] = sigma
+    greeks['valid'] = valid
+
+    return greeks
@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+import numpy as np
+
+
+def easter_sunday(year):
+
+    # anonymous gregorian algorithm
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def nth_weekday(year, month, weekday, n):
+
+    # nth (or last when n < 0) weekday of month
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def observed(day):
+
+    # shift weekend holidays to nearest weekday
+    if day.weekday() == 5: return day - timedelta(days=1)
+    if day.weekday() == 6: return day + timedelta(days=1)
+    return day
+
+
+def market_holidays(year):
+    holidays = [
+        nth_weekday(year, 1, 0, 3), # martin luther king jr. day
+        nth_weekday(year, 2, 0, 3), # washington's birthday
+        easter_sunday(year) - timedelta(days=2), # good friday
+        nth_weekday(year, 5, 0, -1), # memorial day
+        observed(date(year, 7, 4)), # independence day
+        nth_weekday(year, 9, 0, 1), # labor day
+        nth_weekday(year, 11, 3, 4), # thanksgiving day
+        observed(date(year, 12, 25)) # christmas day
+    ]
+
+    # saturday new year is not observed on the prior friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5: holidays.append(observed(new_year))
+    if year >= 2022: holidays.append(observed(date(year, 6, 19))) # juneteenth
+
+    return sorted(holidays)
+
+
+class MarketCalendar:
+
+    calendar = None
+
+    @classmethod
+    def load(cls, start_year=None, end_year=None):
+
+        # build busday calendar once per process
+        if cls.calendar is None:
+            year = date.today().year
+            years = range(start_year or year - 2, (end_year or year + 2) + 1)
+            holidays = [d for y in years for d in market_holidays(y)]
+            cls.calendar = np.busdaycalendar(holidays=np.array(holidays, dtype='datetime64[D]'))
+
+        return cls.calendar
+
+    @classmethod
+    def busday_count(cls, start, end):
+        return int(np.busday_count(start, end, busdaycal=cls.load()))
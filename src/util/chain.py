@@ -0,0 +1,78 @@
+from src.util.bsm import bsm_chain_greeks
+import numpy as np
+
+
+class ChainColumns:
+
+    greek_fields = ['delta', 'gamma', 'theta', 'vega', 'rho']
+
+    def __init__(self, chain):
+        self.size = len(chain)
+
+        # decode levels once
+        self.description = np.array([l['description'] for l in chain], dtype=object)
+        self.root_symbol = np.array([l['root_symbol'] for l in chain], dtype=object)
+        self.is_put = np.array([l['option_type'] == 'put' for l in chain], dtype=bool)
+        self.is_call = np.array([l['option_type'] == 'call' for l in chain], dtype=bool)
+        self.strike = self.__column(chain, 'strike')
+        self.bid = self.__column(chain, 'bid')
+        self.ask = self.__column(chain, 'ask')
+        self.last = self.__column(chain, 'last')
+        self.open_interest = self.__column(chain, 'open_interest')
+        self.volume = self.__column(chain, 'volume')
+
+        # decode vendor greeks
+        greeks = [l.get('greeks') or {} for l in chain]
+        self.iv = self.__column(greeks, 'mid_iv')
+        for f in self.greek_fields:
+            setattr(self, f, self.__column(greeks, f))
+        self.has_greeks = ~np.isnan(self.iv)
+        for f in self.greek_fields:
+            self.has_greeks &= ~np.isnan(getattr(self, f))
+
+    def liquid(self, price_floor, open_interest_floor, volume_floor):
+        with np.errstate(invalid='ignore'):
+            return (self.last > price_floor) & \
+                (self.bid > price_floor) & \
+                (self.ask > price_floor) & \
+                (self.open_interest > open_interest_floor) & \
+                (self.volume > volume_floor)
+
+    def load_greeks(self, underlying, dividend, dte, risk_free_rate, manual_greeks=False):
+        if not manual_greeks:
+            return {
+                'valid': self.has_greeks,
+                'iv': self.iv,
+                'delta': self.delta,
+                'theta': self.theta,
+                'vega': self.vega,
+                'gamma': self.gamma,
+                'rho': self.rho
+            }
+
+        # solve chain greeks in one pass
+        return bsm_chain_greeks(self.last, underlying, self.strike, 
+            dte / 365.0, risk_free_rate, dividend, self.is_put)
+
+    def atm_iv(self, greeks):
+
+        # find closest delta levels
+        diff = np.abs(np.abs(greeks['delta']) - 0.50)
+        put_diff = np.where(greeks['valid'] & self.is_put, diff, np.inf)
+        call_diff = np.where(greeks['valid'] & self.is_call, diff, np.inf)
+        if not np.isfinite(put_diff).any() or not np.isfinite(call_diff).any():
+            raise Exception('Missing ATM levels.')
+
+        # calculate atm iv
+        return (greeks['iv'][np.argmin(put_diff)] + \
+            greeks['iv'][np.argmin(call_diff)]) / 2
+
+    def otm_puts(self, symbol, underlying, price_floor, open_interest_floor, volume_floor):
+        return self.is_put & \
+            (self.strike < underlying) & \
+            (self.root_symbol == symbol) & \
+            self.liquid(price_floor, open_interest_floor, volume_floor)
+
+    def __column(self, levels, field):
+        values = [l.get(field) for l in levels]
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class DeltaCurve:
+
+    def __init__(self, strikes, deltas, lower=0.0, upper=1.0):
+        self.lower = lower
+        self.upper = upper
+
+        # sort & merge duplicate strikes
+        strikes = np.asarray(strikes, dtype=np.float64)
+        deltas = np.abs(np.asarray(deltas, dtype=np.float64))
+        self.x, inv = np.unique(strikes, return_inverse=True)
+        self.y = np.bincount(inv, weights=deltas) / np.bincount(inv)
+        if self.x.shape[0] == 0: raise Exception('Empty delta curve.')
+
+        # monotone knot slopes
+        self.h = np.diff(self.x)
+        self.d = self.__knot_slopes()
+
+    def evaluate(self, price):
+        price = np.asarray(price, dtype=np.float64)
+        if self.x.shape[0] == 1:
+            return np.clip(np.full(price.shape, self.y[0]), self.lower, self.upper)
+
+        # locate intervals
+        i = np.clip(np.searchsorted(self.x, price, side='right') - 1, 0, self.x.shape[0] - 2)
+        h = self.h[i]
+        t = (price - self.x[i]) / h
+
+        # cubic hermite basis
+        t2, t3 = t * t, t * t * t
+        values = (2 * t3 - 3 * t2 + 1) * self.y[i] + \
+            (t3 - 2 * t2 + t) * h * self.d[i] + \
+            (-2 * t3 + 3 * t2) * self.y[i + 1] + \
+            (t3 - t2) * h * self.d[i + 1]
+
+        # extend linearly past the end knots
+        values = np.where(price < self.x[0], self.y[0] + (price - self.x[0]) * self.d[0], values)
+        values = np.where(price > self.x[-1], self.y[-1] + (price - self.x[-1]) * self.d[-1], values)
+
+        return np.clip(values, self.lower, self.upper)
+
+    def __knot_slopes(self):
+        n = self.x.shape[0]
+        d = np.zeros(n)
+        if n < 2: return d
+        secants = np.diff(self.y) / self.h
+        if n == 2: return np.full(n, secants[0])
+
+        # weighted harmonic mean on same-sign secants (fritsch-carlson)
+        h0, h1 = self.h[:-1], self.h[1:]
+        s0, s1 = secants[:-1], secants[1:]
+        w0, w1 = 2 * h1 + h0, h1 + 2 * h0
+        same_sign = s0 * s1 > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d[1:-1] = np.where(same_sign, (w0 + w1) / (w0 / s0 + w1 / s1), 0.0)
+
+        # shape-preserving end slopes
+        d[0] = self.__end_slope(self.h[0], self.h[1], secants[0], secants[1])
+        d[-1] = self.__end_slope(self.h[-1], self.h[-2], secants[-1], secants[-2])
+
+        return d
+
+    def __end_slope(self, h0, h1, s0, s1):
+        d = ((2 * h0 + h1) * s0 - h0 * s1) / (h0 + h1)
+        if np.sign(d) != np.sign(s0): return 0.0
+        if np.sign(s0) != np.sign(s1) and abs(d) > abs(3 * s0): return 3 * s0
+        return d
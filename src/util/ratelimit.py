@@ -0,0 +1,69 @@
+import multiprocessing
+import asyncio
+import time
+
+
+class TokenBucketRateLimiter:
+
+    def __init__(self, allowed=120, window=60.0, reserve=0, stale_tolerance=1.0):
+        self.window = window
+        self.reserve = reserve
+        self.stale_tolerance = stale_tolerance
+
+        # shared bucket state
+        self.lk = multiprocessing.Lock()
+        self.tokens = multiprocessing.RawValue('d', allowed)
+        self.allowed = multiprocessing.RawValue('i', allowed)
+        self.expiry = multiprocessing.RawValue('d', 0.0)
+        self.stale_expiry = multiprocessing.RawValue('d', 0.0)
+        self.confirmed = multiprocessing.RawValue('b', False)
+
+    def try_acquire(self):
+        with self.lk:
+            now = time.time()
+
+            # refill at window expiry
+            if now >= self.expiry.value:
+                self.stale_expiry.value = self.expiry.value
+                self.tokens.value = self.allowed.value
+                self.expiry.value = now + self.window
+                self.confirmed.value = False
+
+            # grant available token
+            if self.tokens.value - self.reserve >= 1:
+                self.tokens.value -= 1
+                return 0.0
+
+            return max(self.expiry.value - now, 0.001)
+
+    def acquire(self):
+        while True:
+            delay = self.try_acquire()
+            if delay == 0.0: return
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        while True:
+            delay = self.try_acquire()
+            if delay == 0.0: return
+            await asyncio.sleep(delay)
+
+    def update(self, available, allowed, expiry):
+        expiry = expiry / 1000.0
+
+        with self.lk:
+
+            # ignore responses from previous windows
+            if self.confirmed.value:
+                if expiry < self.expiry.value - self.stale_tolerance: return
+                new_window = expiry > self.expiry.value + self.stale_tolerance
+            else:
+                if expiry < self.stale_expiry.value + self.stale_tolerance: return
+                new_window = False
+
+            # reconcile bucket with reported window
+            if new_window: self.tokens.value = available
+            else: self.tokens.value = min(self.tokens.value, available)
+            self.allowed.value = allowed
+            self.expiry.value = expiry
+            self.confirmed.value = True
@@ -0,0 +1,76 @@
+import numpy as np
+
+
+put_chain_fields = [
+    'underlying', 'premium', 'dte', 'roc', 'be', 'moneyness',
+    'prob_itm_delta', 'prob_be_delta', 'prob_be_iv', 'iv', 'iv_skew'
+]
+
+put_quote_fields = [
+    'udl_year_ret', 'udl_year_ret_r2', 'udl_year_market_corr', 'udl_hist_vol',
+    'udl_hv_percentile', 'udl_iv_percentile', 'above_be_percentile', 'exp_move_conf'
+]
+
+put_contract_dtype = np.dtype(
+    [('symbol_id', np.int32), ('expiration', 'datetime64[D]'), ('strike', np.float64), ('option_type', 'S1')] + \
+    [(f, np.float64) for f in put_chain_fields + put_quote_fields]
+)
+
+
+def empty_records(dtype=put_contract_dtype):
+    return np.zeros(0, dtype=dtype)
+
+
+def concat_records(results, dtype=put_contract_dtype):
+
+    # stack per-chain record blocks
+    blocks = [r for r in results.values() if len(r) > 0]
+    if len(blocks) == 0: return empty_records(dtype)
+    return np.concatenate(blocks)
+
+
+def contract_descriptions(records, symbols):
+    labels = []
+
+    # rebuild vendor-style descriptions
+    for symbol_id, expiration, strike, option_type in zip(records['symbol_id'].tolist(),
+        records['expiration'].tolist(), records['strike'].tolist(), records['option_type'].tolist()):
+        labels.append('{} {} ${:.2f} {}'.format(
+            symbols[symbol_id],
+            expiration.strftime('%B %d %Y'),
+            strike,
+            'Put' if option_type == b'P' else 'Call'
+        ))
+
+    return labels
+
+
+class RecordBuffer:
+
+    def __init__(self, capacity=1024, dtype=put_contract_dtype):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+        self.offsets = [0]
+
+    def append(self, records):
+        end = self.size + records.shape[0]
+
+        # grow geometrically when full
+        if end > self.data.shape[0]:
+            data = np.empty(max(end, 2 * self.data.shape[0]), dtype=self.data.dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+
+        # copy block into place
+        self.data[self.size:end] = records
+        self.size = end
+        self.offsets.append(end)
+
+    def blocks(self):
+        return [self.data[i:j] for i, j in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def to_records(self):
+        return self.data[:self.size].copy()
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,52 @@
+from src.util.records import put_contract_dtype, empty_records
+import numpy as np
+import itertools
+import heapq
+
+
+def annualized_returns(records):
+    return (1.0 + records['roc']) ** (365.2425 / records['dte']) - 1.0
+
+
+def prob_itm_rank(records):
+    return np.abs(records['prob_itm_delta'])
+
+
+class PutContractFilter:
+
+    def __init__(self, aroc_limit=None, prob_itm_limit=None):
+        self.aroc_limit = aroc_limit
+        self.prob_itm_limit = prob_itm_limit
+
+    def __call__(self, records):
+        mask = np.ones(records.shape[0], dtype=bool)
+
+        # executor contract limits
+        if self.aroc_limit is not None:
+            mask &= annualized_returns(records) >= self.aroc_limit
+        if self.prob_itm_limit is not None:
+            mask &= prob_itm_rank(records) < self.prob_itm_limit
+
+        return mask
+
+
+def select_top_k(records, rank_key, top_k=None):
+
+    # stable ascending rank order
+    order = np.argsort(rank_key(records), kind='stable')
+    if top_k is not None: order = order[:top_k]
+    return records[order]
+
+
+def merge_ranked_records(blocks, rank_key, dtype=put_contract_dtype):
+    blocks = [b for b in blocks if len(b) > 0]
+    if len(blocks) == 0: return empty_records(dtype)
+
+    # heap merge rank-sorted blocks
+    streams = [zip(rank_key(b).tolist(), itertools.repeat(i), range(len(b))) for i, b in enumerate(blocks)]
+    merged = [(i, j) for _, i, j in heapq.merge(*streams)]
+
+    # gather rows in merged order
+    offsets = np.cumsum([0] + [len(b) for b in blocks[:-1]])
+    rows = np.array([offsets[i] + j for i, j in merged], dtype=np.int64)
+    return np.concatenate(blocks)[rows]
@@ -0,0 +1,113 @@
+from multiprocessing import shared_memory
+from queue import Empty
+import multiprocessing
+import numpy as np
+import time
+import os
+
+
+class SharedArray:
+
+    def __init__(self, array):
+        array = np.ascontiguousarray(array)
+        self.shape = array.shape
+        self.dtype = array.dtype.str
+
+        # copy array into shared block
+        self.shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.name = self.shm.name
+        self.owner = os.getpid()
+        np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)[:] = array
+
+    def __getstate__(self):
+        return {
+            'name': self.name,
+            'shape': self.shape,
+            'dtype': self.dtype,
+            'owner': self.owner
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        # attach to parent block
+        self.shm = shared_memory.SharedMemory(name=self.name)
+
+    def view(self):
+
+        # zero-copy read-only view
+        array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+        array.flags.writeable = False
+        return array
+
+    def unlink(self):
+        self.shm.close()
+
+        # only the creating process frees the block
+        if self.owner == os.getpid(): self.shm.unlink()
+
+
+class SharedCounter:
+
+    def __init__(self, value=0):
+
+        # lock-guarded shared memory value
+        self.lk = multiprocessing.Lock()
+        self.counter = multiprocessing.RawValue('q', value)
+
+    @property
+    def value(self):
+        return self.counter.value
+
+    def increment(self, n=1):
+        with self.lk:
+            self.counter.value += n
+            return self.counter.value
+
+
+class SymbolQueue:
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+
+        # shared claim & completion cursors
+        self.claimed = SharedCounter()
+        self.completed = SharedCounter()
+
+    def get(self, block=False):
+        i = self.claimed.increment() - 1
+        if i >= len(self.symbols): raise Empty
+        return self.symbols[i]
+
+    def task_done(self):
+        self.completed.increment()
+
+    def close(self):
+
+        # push claim cursor past the end
+        self.claimed.increment(len(self.symbols))
+
+    def qsize(self):
+        return max(len(self.symbols) - self.claimed.value, 0)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def done(self):
+        return self.completed.value >= len(self.symbols)
+
+    def join(self, poll=0.05):
+        while not self.done(): time.sleep(poll)
+
+
+def drain_queue(queue, timeout=None):
+
+    # wait for the first item when asked
+    if timeout is not None:
+        try: yield queue.get(timeout=timeout)
+        except Empty: return
+
+    # pop items without blocking
+    while True:
+        try: yield queue.get_nowait()
+        except Empty: return
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+class SpreadProfitGrid:
+
+    def __init__(self, strikes, curve, resolution=0.1):
+        self.strikes = np.unique(np.asarray(strikes, dtype=np.float64))
+
+        # subdivide each strike interval at resolution
+        steps = np.maximum(np.round(np.diff(self.strikes) / resolution).astype(np.int64), 1)
+        self.knots = np.concatenate(([0], np.cumsum(steps)))
+        offsets = np.arange(self.knots[-1]) - np.repeat(self.knots[:-1], steps)
+        grid = np.repeat(self.strikes[:-1], steps) + \
+            np.repeat(np.diff(self.strikes) / steps, steps) * offsets
+        grid = np.concatenate((grid, self.strikes[-1:]))
+
+        # cumulative interval probability & moment
+        prob = np.maximum(np.diff(curve.evaluate(grid)), 0.0)
+        mid = (grid[:-1] + grid[1:]) / 2
+        self.cum_prob = np.concatenate(([0.0], np.cumsum(prob)))
+        self.cum_moment = np.concatenate(([0.0], np.cumsum(prob * mid)))
+
+    def expected_spread_profit(self, buy_strike, sell_strike, premium):
+        i = self.knots[np.searchsorted(self.strikes, buy_strike)]
+        j = self.knots[np.searchsorted(self.strikes, sell_strike)]
+
+        # integrate payoff between strikes
+        spread_prob = self.cum_prob[j] - self.cum_prob[i]
+        spread_profit = self.cum_moment[j] - self.cum_moment[i] + \
+            (premium - sell_strike) * spread_prob
+
+        return spread_profit, spread_prob
@@ -0,0 +1,45 @@
+from src.util.analytics import price_returns, regress_ranges, market_correlations, expected_moves
+from scipy.stats import pearsonr
+import pandas as pd
+import numpy as np
+
+
+def build_closes(n_symbols=5, n_days=120, seed=7):
+    rng = np.random.default_rng(seed)
+    rets = rng.normal(0.0005, 0.02, size=(n_symbols, n_days - 1))
+    return 100.0 * np.cumprod(np.column_stack((np.ones(n_symbols), 1 + rets)), axis=-1)
+
+
+def test_regress_ranges_match_least_squares():
+    closes = build_closes()
+    ret, score = regress_ranges(closes, 30)
+
+    # reference per-symbol polyfit r-squared
+    for i in range(closes.shape[0]):
+        y = closes[i, -30:]
+        x = np.arange(y.shape[0])
+        fit = np.polyval(np.polyfit(x, y, 1), x)
+        r2 = 1 - ((y - fit) ** 2).sum() / ((y - y.mean()) ** 2).sum()
+        assert np.isclose(score[i], r2)
+        assert np.isclose(ret[i], np.clip((y[-1] - y[0]) / y[0], -1.0, 1.0))
+
+
+def test_market_correlations_match_pearsonr():
+    rets = price_returns(build_closes())
+    corr, beta = market_correlations(rets[1:], rets[0])
+
+    # reference per-symbol correlation & beta
+    for i in range(1, rets.shape[0]):
+        assert np.isclose(corr[i - 1], pearsonr(rets[i], rets[0])[0])
+        assert np.isclose(beta[i - 1], np.polyfit(rets[0], rets[i], 1)[0])
+
+
+def test_expected_moves_match_pct_change():
+    closes = build_closes(n_symbols=1)[0]
+    table = expected_moves(closes, 42)
+
+    # reference pandas move per horizon
+    assert np.isnan(table[0])
+    for horizon in range(1, 43):
+        moves = np.abs(pd.DataFrame(closes).pct_change(periods=horizon).dropna().to_numpy())
+        assert np.isclose(table[horizon], moves.mean() + 1.2815 * moves.std(ddof=1))
@@ -0,0 +1,56 @@
+from src.util.bsm import bsm_price, bsm_greeks, bsm_implied_volatility, bsm_chain_greeks
+import numpy as np
+
+
+S, t, r, q = 100.0, 30 / 365.0, 0.01, 0.02
+strikes = np.array([80.0, 90.0, 95.0, 100.0, 105.0, 110.0, 120.0])
+is_put = np.array([True, True, True, True, False, False, False])
+
+
+def test_implied_volatility_round_trip():
+    sigma = np.array([0.55, 0.40, 0.32, 0.28, 0.26, 0.27, 0.35])
+    prices = bsm_price(S, strikes, t, r, sigma, q, is_put)
+
+    # solved iv reprices the chain
+    iv = bsm_implied_volatility(prices, S, strikes, t, r, q, is_put)
+    assert np.allclose(iv, sigma, rtol=0.0, atol=1e-6)
+
+
+def test_implied_volatility_rejects_arbitrage_prices():
+
+    # below intrinsic & above the underlying
+    prices = np.array([15.0, 1e3])
+    iv = bsm_implied_volatility(prices, S, np.array([120.0, 100.0]), t, r, q, np.array([True, False]))
+    assert np.isnan(iv).all()
+
+
+def test_greeks_match_finite_differences():
+    sigma = 0.3
+    greeks = bsm_greeks(S, strikes, t, r, sigma, q, is_put)
+    price = lambda **kw: bsm_price(**dict(dict(S=S, K=strikes, t=t, r=r, sigma=sigma, q=q, is_put=is_put), **kw))
+
+    # central differences in each input
+    h = 1e-4
+    delta = (price(S=S + h) - price(S=S - h)) / (2 * h)
+    gamma = (price(S=S + 1e-2) - 2 * price() + price(S=S - 1e-2)) / 1e-4
+    vega = (price(sigma=sigma + h) - price(sigma=sigma - h)) / (2 * h) * 0.01
+    theta = -(price(t=t + h) - price(t=t - h)) / (2 * h) / 365.0
+    rho = (price(r=r + h) - price(r=r - h)) / (2 * h) * 0.01
+
+    assert np.allclose(greeks['delta'], delta, atol=1e-6)
+    assert np.allclose(greeks['gamma'], gamma, atol=1e-5)
+    assert np.allclose(greeks['vega'], vega, atol=1e-6)
+    assert np.allclose(greeks['theta'], theta, atol=1e-6)
+    assert np.allclose(greeks['rho'], rho, atol=1e-6)
+
+
+def test_chain_greeks_drop_unsolved_levels():
+    sigma = np.full(strikes.shape, 0.3)
+    prices = bsm_price(S, strikes, t, r, sigma, q, is_put)
+    prices[0] = 0.0
+
+    # unsolved levels come back invalid
+    greeks = bsm_chain_greeks(prices, S, strikes, t, r, q, is_put)
+    assert not greeks['valid'][0] and greeks['valid'][1:].all()
+    assert np.isnan(greeks['delta'][0])
+    assert np.allclose(greeks['iv'][1:], 0.3, atol=1e-6)
@@ -0,0 +1,18 @@
+from src.util.calendar import MarketCalendar, market_holidays
+from datetime import date
+
+
+def test_market_holidays_2026():
+    assert market_holidays(2026) == [
+        date(2026, 1, 1), date(2026, 1, 19), date(2026, 2, 16), date(2026, 4, 3),
+        date(2026, 5, 25), date(2026, 6, 19), date(2026, 7, 3), date(2026, 9, 7),
+        date(2026, 11, 26), date(2026, 12, 25)
+    ]
+
+
+def test_busday_count_skips_thanksgiving():
+
+    # monday to monday over thanksgiving week
+    assert MarketCalendar.busday_count(date(2026, 11, 23), date(2026, 11, 30)) == 4
+    assert MarketCalendar.busday_count(date(2026, 11, 16), date(2026, 11, 23)) == 5
+    assert MarketCalendar.busday_count(date(2026, 11, 26), date(2026, 11, 27)) == 0
@@ -0,0 +1,31 @@
+from src.util.curve import DeltaCurve
+import numpy as np
+
+
+strikes = np.array([80.0, 85.0, 90.0, 92.5, 95.0, 97.5, 100.0])
+deltas = np.array([-0.02, -0.05, -0.12, -0.20, -0.31, -0.42, -0.53])
+
+
+def test_curve_interpolates_knots():
+    curve = DeltaCurve(strikes, deltas)
+    assert np.allclose(curve.evaluate(strikes), np.abs(deltas))
+
+
+def test_curve_is_monotone():
+
+    # flat & steep segments keep their shape
+    curve = DeltaCurve(strikes, [-0.02, -0.02, -0.02, -0.30, -0.31, -0.31, -0.90])
+    values = curve.evaluate(np.linspace(70.0, 110.0, 4001))
+    assert (np.diff(values) >= -1e-12).all()
+
+
+def test_curve_clips_extrapolation():
+    curve = DeltaCurve(strikes, deltas)
+    values = curve.evaluate(np.array([0.0, 50.0, 150.0, 1e4]))
+    assert (values >= 0.0).all() and (values <= 1.0).all()
+    assert values[0] == 0.0 and values[-1] == 1.0
+
+
+def test_curve_merges_duplicate_strikes():
+    curve = DeltaCurve([90.0, 90.0, 95.0], [-0.10, -0.20, -0.30])
+    assert np.allclose(curve.evaluate(np.array([90.0, 95.0])), [0.15, 0.30])
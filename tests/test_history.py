@@ -0,0 +1,109 @@
+from src.api.history import HistoryStore
+from src.api.yfinance import YFinanceAPI
+import src.api.yfinance as yfinance
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+
+def build_bars(dates, closes):
+    bars = np.zeros(len(dates), dtype=HistoryStore.dtype)
+    bars['date'] = dates
+    for f in HistoryStore.fields: bars[f] = closes
+    return bars
+
+
+class FakeDownload:
+
+    def __init__(self, series, failed=()):
+        self.series = series
+        self.failed = failed
+        self.starts = []
+
+    def __call__(self, tickers, start=None, period=None, **kwargs):
+        self.starts.append(start)
+
+        # serve adjusted bars from start
+        frames = {}
+        for symbol in tickers.split(' '):
+            bars = self.series[symbol]
+            bars = bars[bars['date'] >= np.datetime64(start, 'D')]
+
+            # failed tickers come back as empty columns
+            if symbol in self.failed:
+                bars = bars.copy()
+                for f in HistoryStore.fields: bars[f] = np.nan
+            index = pd.DatetimeIndex(bars['date'].astype('datetime64[ns]'))
+            for f in HistoryStore.fields:
+                frames[(f.capitalize(), symbol)] = pd.Series(bars[f], index=index)
+
+        return pd.DataFrame(frames)
+
+
+def test_split_adjusted_bars_rewrite_series(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    today = np.datetime64(date.today(), 'D')
+    dates = np.arange(today - 360, today)
+
+    # adjusted series after a 2:1 split three days ago
+    split = dates >= today - 3
+    adjusted = build_bars(dates, np.full(dates.shape[0], 50.0))
+    index = build_bars(dates, np.full(dates.shape[0], 400.0))
+    download = FakeDownload({'SPY': index, 'ABC': adjusted})
+    monkeypatch.setattr(yfinance.yf, 'download', download)
+
+    # store unadjusted series synced before the split
+    store = HistoryStore()
+    store.append('ABC', build_bars(dates[~split], np.full((~split).sum(), 100.0)))
+    store.append('SPY', index)
+    store.meta['ABC'] = str(date.today() - timedelta(days=3))
+    store.save_meta()
+
+    # sync appends split-adjusted bars
+    api = YFinanceAPI(live_quotes=False)
+    history = api.fetch_universe_closes(['ABC'])
+
+    # stored series rewritten to adjusted closes
+    stored = HistoryStore().load('ABC')
+    assert np.array_equal(stored['date'], dates)
+    assert np.allclose(stored['close'], 50.0)
+    assert np.allclose(history.get('ABC'), 50.0)
+    assert len(download.starts) == 2
+
+
+def test_failed_download_leaves_symbol_unsynced(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    today = np.datetime64(date.today(), 'D')
+    dates = np.arange(today - 360, today)
+    bars = build_bars(dates, np.full(dates.shape[0], 100.0))
+    download = FakeDownload({'SPY': bars, 'ABC': bars}, failed=['ABC'])
+    monkeypatch.setattr(yfinance.yf, 'download', download)
+
+    # store series synced before the last sessions
+    store = HistoryStore()
+    for symbol in ['SPY', 'ABC']:
+        store.append(symbol, bars[:-5])
+        store.meta[symbol] = str(date.today() - timedelta(days=7))
+    store.save_meta()
+
+    # failed ticker stays stale for the next sync
+    YFinanceAPI(live_quotes=False).fetch_universe_closes(['ABC'])
+    store = HistoryStore()
+    assert store.is_synced('SPY')
+    assert not store.is_synced('ABC')
+    assert store.last_date('ABC') == dates[-6]
+
+
+def test_unadjusted_bars_append_to_series(tmp_path):
+    store = HistoryStore(root=str(tmp_path))
+    today = np.datetime64(date.today(), 'D')
+    dates = np.arange(today - 10, today)
+    store.append('ABC', build_bars(dates[:7], np.full(7, 100.0)))
+
+    # overlapping bars with matching closes extend series
+    assert store.append('ABC', build_bars(dates[4:], np.full(6, 100.0)))
+    assert np.array_equal(store.load('ABC')['date'], dates)
+
+    # overlapping bars with adjusted closes are rejected
+    assert not store.append('ABC', build_bars(dates[8:], np.full(2, 50.0)))
+    assert np.array_equal(store.load('ABC')['date'], dates)
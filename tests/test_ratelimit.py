@@ -0,0 +1,59 @@
+from src.util.ratelimit import TokenBucketRateLimiter
+import src.util.ratelimit as ratelimit
+
+
+class FakeClock:
+
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.now += delay
+
+
+def count_grants(limiter, max_grants=100):
+    grants = 0
+    while grants < max_grants and limiter.try_acquire() == 0.0: grants += 1
+    return grants
+
+
+def test_stale_update_after_local_refill(monkeypatch):
+    clock = FakeClock(1000.0)
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    limiter = TokenBucketRateLimiter(allowed=5, window=60.0)
+
+    # confirm server window
+    assert limiter.try_acquire() == 0.0
+    limiter.update(4, 5, 1060.0 * 1000)
+
+    # refill locally after expiry
+    clock.now = 1061.0
+    assert limiter.try_acquire() == 0.0
+
+    # late response from the expired window
+    limiter.update(0, 5, 1060.0 * 1000)
+    assert limiter.expiry.value == 1121.0
+    assert 1 + count_grants(limiter) == 5
+
+
+def test_new_window_update_after_local_refill(monkeypatch):
+    clock = FakeClock(1000.0)
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    limiter = TokenBucketRateLimiter(allowed=5, window=60.0)
+
+    # confirm server window
+    assert limiter.try_acquire() == 0.0
+    limiter.update(4, 5, 1060.0 * 1000)
+
+    # refill locally long after expiry
+    clock.now = 1090.0
+    assert limiter.try_acquire() == 0.0
+
+    # response from the next server window
+    limiter.update(2, 5, 1120.0 * 1000)
+    assert limiter.expiry.value == 1120.0
+    assert limiter.confirmed.value
+    assert count_grants(limiter) == 2
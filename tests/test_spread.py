@@ -0,0 +1,47 @@
+from src.util.curve import DeltaCurve
+from src.util.spread import SpreadProfitGrid
+import itertools
+import numpy as np
+
+
+def loop_spread_profit(width, premium, buy_strike, sell_strike, curve, resolution=0.1):
+    total_spread_prob = 0
+    expected_profit = 0
+
+    # reference per-interval integrator
+    for i in range(int(width / resolution)):
+        lo = round(buy_strike + resolution * i, 2)
+        hi = round(lo + resolution, 2)
+        future_price = round((lo + hi) / 2, 2)
+        interval_prob = max(float(curve.evaluate(hi) - curve.evaluate(lo)), 0)
+        expected_profit += interval_prob * ((future_price - sell_strike) + premium)
+        total_spread_prob += interval_prob
+
+    return expected_profit, total_spread_prob
+
+
+def test_grid_matches_loop_integrator():
+    strikes = np.array([85.0, 88.0, 90.0, 91.0, 93.0, 95.0, 96.0, 98.0])
+    curve = DeltaCurve(strikes, [-0.04, -0.07, -0.11, -0.14, -0.21, -0.30, -0.35, -0.47])
+    grid = SpreadProfitGrid(strikes, curve, resolution=0.1)
+
+    # every (buy, sell) pair over whole-dollar widths
+    for buy, sell in itertools.combinations(strikes, 2):
+        premium = 0.1 * (sell - buy)
+        profit, prob = grid.expected_spread_profit(buy, sell, premium)
+        loop_profit, loop_prob = loop_spread_profit(sell - buy, premium, buy, sell, curve)
+        assert np.isclose(profit, loop_profit, atol=1e-9)
+        assert np.isclose(prob, loop_prob, atol=1e-9)
+
+
+def test_grid_vectorizes_over_pairs():
+    strikes = np.array([90.0, 92.0, 95.0, 100.0])
+    curve = DeltaCurve(strikes, [-0.10, -0.16, -0.27, -0.50])
+    grid = SpreadProfitGrid(strikes, curve)
+
+    # array lookups match scalar lookups
+    buy, sell = np.array([90.0, 90.0, 92.0]), np.array([95.0, 100.0, 100.0])
+    profit, prob = grid.expected_spread_profit(buy, sell, np.array([1.0, 2.0, 1.5]))
+    for i in range(buy.shape[0]):
+        scalar = grid.expected_spread_profit(buy[i], sell[i], [1.0, 2.0, 1.5][i])
+        assert np.isclose(profit[i], scalar[0]) and np.isclose(prob[i], scalar[1])